@@ -0,0 +1,79 @@
+"""Сравнение скорости normalize_string с исходной построчной реализацией.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_normalize --rows 1000000
+"""
+import argparse
+import random
+import re
+import time
+import unicodedata
+import pandas as pd
+from core.normalizer import CHAR_MAP, extract_surname, extract_surname_series, normalize_series, normalize_string
+
+SAMPLES = [
+    "Приёмный пункт", "ПП НМУС1", "пп  БСВЗ1", "ИКНТ-1", "OMЛД1", "Нов0сибирская обл.",
+    "Кемеровская область - Кузбасс обл", "Абдукундузов Иван Петрович", "ШВЕЦОВ  А.А.",
+    "Chernov", "Ёлкин, Семён", "  Хакасия Респ  ", "НСТЦ4\t", "Ёжиков", "ЛЦМ Приём",
+    "", "123", "№ 5 (старый)", "Tомская oбл",
+]
+
+
+def reference_normalize_string(s: str) -> str:
+    """Исходная реализация: последовательные replace и некомпилированные regex"""
+    if not isinstance(s, str):
+        return ""
+    for char, replacement in CHAR_MAP.items():
+        s = s.replace(char, replacement)
+    s = s.lower()
+    s = re.sub(r'[^\w\s]', '', s)
+    s = re.sub(r'\s+', ' ', s).strip()
+    s = unicodedata.normalize('NFC', s)
+    return s
+
+
+def make_series(rows: int, distinct: int, seed: int = 0) -> pd.Series:
+    rng = random.Random(seed)
+    values = [f"{rng.choice(SAMPLES)} {rng.randrange(distinct)}" for _ in range(rows)]
+    for i in range(0, rows, 97):
+        values[i] = None
+    for i in range(0, rows, 101):
+        values[i] = 42.0
+    return pd.Series(values, dtype=object)
+
+
+def timed(func):
+    started = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк нормализации строк")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--distinct", type=int, default=50,
+                        help="число различных суффиксов у каждого образца (кардинальность столбца)")
+    args = parser.parse_args()
+
+    values = make_series(args.rows, args.distinct)
+    expected, reference_time = timed(lambda: values.apply(reference_normalize_string))
+    scalar, scalar_time = timed(lambda: values.apply(normalize_string))
+    vector, vector_time = timed(lambda: normalize_series(values))
+    surnames, surnames_time = timed(lambda: values.apply(extract_surname))
+    surnames_vector, surnames_vector_time = timed(lambda: extract_surname_series(values))
+
+    if not (expected.tolist() == scalar.tolist() == vector.tolist()):
+        raise SystemExit("Результаты normalize_string расходятся с исходной реализацией")
+    if surnames.tolist() != surnames_vector.tolist():
+        raise SystemExit("Результаты extract_surname_series расходятся с extract_surname")
+
+    print(f"Строк: {args.rows}, различных значений: {values.nunique()}")
+    print(f"исходный normalize_string (.apply):  {reference_time:8.3f} с")
+    print(f"normalize_string (.apply):           {scalar_time:8.3f} с  x{reference_time / scalar_time:.1f}")
+    print(f"normalize_series:                    {vector_time:8.3f} с  x{reference_time / vector_time:.1f}")
+    print(f"extract_surname (.apply):            {surnames_time:8.3f} с")
+    print(f"extract_surname_series:              {surnames_vector_time:8.3f} с  x{surnames_time / surnames_vector_time:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Время и число обращений к Excel по этапам обновления отчета.
+
+Выгрузка, конфигурация и лист отчета генерируются (benchmarks.synthetic),
+лист - заглушка xlwings в памяти, которая считает чтения и записи.
+Если число обращений (или время, если оно задано в бюджете) превышает
+бюджет, бенчмарк завершается с кодом 1.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_pipeline --rows 200000 --points 2000
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from core.aggregation import build_run_context
+from core.input_reader import categorize_keys, resolve_source_columns
+from core.normalizer import NORMALIZE_CACHE, SURNAME_CACHE, normalize_series, normalize_string
+from core.report_updater import configured_area, process_data, update_points_table, update_region_table
+from core.workbook import SheetSnapshot, XlwingsSheet
+from benchmarks.synthetic import make_config, make_export, make_report_sheet
+
+# Допустимое число обращений к листу на этап для конфигурации из двух таблиц
+# регионов и двух таблиц пунктов со сплошными подписями строк
+BUDGET = {
+    "snapshot": {"reads": 1, "writes": 0},
+    "update_region_table": {"reads": 0, "writes": 2},
+    "update_points_table": {"reads": 0, "writes": 2},
+    "update_region_table (без снимка)": {"reads": 4, "writes": 2},
+    "update_points_table (без снимка)": {"reads": 2, "writes": 2},
+}
+
+
+class StageTimer:
+    def __init__(self, counter):
+        self.counter = counter
+        self.results = {}
+
+    def run(self, name: str, func):
+        self.counter.reset()
+        started = time.perf_counter()
+        result = func()
+        self.results[name] = {"seconds": time.perf_counter() - started, **self.counter.stats()}
+        return result
+
+
+def prepare_config(config: dict) -> dict:
+    # Так же, как load_config: названия столбцов сравниваются в нормализованном виде
+    config["source_columns"] = {key: NORMALIZE_CACHE(value) for key, value in config["source_columns"].items()}
+    return config
+
+
+def run_stages(rows: int, managers: int, regions: int, points: int, sectors: int, day: int) -> dict:
+    config = prepare_config(make_config(managers, regions, points, sectors))
+    export = make_export(config, rows)
+    fake_sheet = make_report_sheet(config)
+    sheet = XlwingsSheet(fake_sheet)
+    timer = StageTimer(fake_sheet.counter)
+
+    def normalize():
+        NORMALIZE_CACHE.clear()
+        SURNAME_CACHE.clear()
+        distinct = export[config["source_columns"]["point"]].unique()
+        for value in distinct:
+            normalize_string(value)
+        for key in ("region", "manager", "point"):
+            normalize_series(export[config["source_columns"][key]])
+
+    timer.run("normalize_string", normalize)
+    timer.run("process_data", lambda: process_data(export.copy(), config))
+
+    def source_table():
+        df = export.rename(columns=resolve_source_columns(export.columns, config))
+        return categorize_keys(df, config)
+
+    source_df = timer.run("categorize_keys", source_table)
+    context = timer.run("build_run_context", lambda: build_run_context(source_df, config))
+    snapshot = timer.run("snapshot", lambda: SheetSnapshot.read(sheet, *configured_area(config)))
+
+    def tables(update, key, reader):
+        def run():
+            for table in config[key]:
+                update(sheet, context, day, table, config, reader)
+        return run
+
+    timer.run("update_region_table", tables(update_region_table, "region_tables", snapshot))
+    timer.run("update_points_table", tables(update_points_table, "new_points_tables", snapshot))
+    timer.run("update_region_table (без снимка)", tables(update_region_table, "region_tables", None))
+    timer.run("update_points_table (без снимка)", tables(update_points_table, "new_points_tables", None))
+    return timer.results
+
+
+def check_budget(results: dict, budget: dict) -> list:
+    errors = []
+    for stage, limits in budget.items():
+        if stage not in results:
+            continue
+        for metric, limit in limits.items():
+            value = results[stage].get(metric)
+            if value is not None and value > limit:
+                errors.append(f"{stage}: {metric} = {value:g} при бюджете {limit:g}")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк этапов обновления отчета")
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--managers", type=int, default=200)
+    parser.add_argument("--regions", type=int, default=100)
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--sectors", type=int, default=20)
+    parser.add_argument("--day", type=int, default=15)
+    parser.add_argument("--budget", help="JSON с бюджетом {этап: {reads, writes, seconds}} вместо встроенного")
+    parser.add_argument("--json", action="store_true", help="вывести результаты в JSON")
+    args = parser.parse_args()
+
+    # Предупреждения о ненайденных значениях при генерации ожидаемы
+    logging.getLogger().setLevel(logging.ERROR)
+    results = run_stages(args.rows, args.managers, args.regions, args.points, args.sectors, args.day)
+
+    budget = BUDGET
+    if args.budget:
+        with open(args.budget, 'r', encoding='utf-8') as f:
+            budget = json.load(f)
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        print(f"Строк: {args.rows}, менеджеров: {args.managers}, регионов: {args.regions}, пунктов: {args.points}")
+        for stage, result in results.items():
+            print(f"{stage:35} {result['seconds']:8.3f} с  чтений: {result['reads']:4}  записей: {result['writes']:4}")
+
+    errors = check_budget(results, budget)
+    if errors:
+        print("Превышен бюджет:", file=sys.stderr)
+        for error in errors:
+            print(f"  {error}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
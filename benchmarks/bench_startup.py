@@ -0,0 +1,68 @@
+"""Время холодного импорта модулей при запуске приложения.
+
+Импортирует модуль (по умолчанию gui.main_window, который загружает
+app_launcher до показа окна) в отдельном процессе с python -X importtime
+и выводит самые дорогие модули. Завершается с кодом 1, если при запуске
+загружаются тяжелые библиотеки или импорт дольше бюджета.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_startup
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+# Эти библиотеки должны загружаться только при обновлении отчета или в редакторах
+HEAVY_MODULES = ("pandas", "numpy", "xlwings", "openpyxl", "pyarrow")
+
+
+def import_times(module: str) -> tuple:
+    """Возвращает ({модуль: (собственное время, с вложенными) в мс}, общее время процесса в с)"""
+    code = f"import {module}"
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True,
+    )
+    elapsed = time.perf_counter() - started
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(self_us) / 1000, int(cumulative_us) / 1000)
+    return times, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк времени запуска")
+    parser.add_argument("--module", default="gui.main_window")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--budget-ms", type=float, default=300,
+                        help="предел суммарного времени импорта модуля")
+    args = parser.parse_args()
+
+    times, elapsed = import_times(args.module)
+    total = times.get(args.module, (0, 0))[1]
+    print(f"Импорт {args.module}: {total:.1f} мс (процесс целиком {elapsed * 1000:.0f} мс)")
+    print(f"{'модуль':50} {'свое, мс':>10} {'всего, мс':>10}")
+    for name, (own, cumulative) in sorted(times.items(), key=lambda item: item[1][1], reverse=True)[:args.top]:
+        print(f"{name:50} {own:10.1f} {cumulative:10.1f}")
+
+    errors = []
+    loaded = [name for name in HEAVY_MODULES if name in times]
+    if loaded:
+        errors.append(f"при запуске загружаются: {', '.join(loaded)}")
+    if total > args.budget_ms:
+        errors.append(f"импорт {total:.1f} мс при бюджете {args.budget_ms:g} мс")
+    if errors:
+        for error in errors:
+            print(error, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""Заглушки объектов xlwings (App, Book, Sheet, Range), хранящие ячейки в памяти.
+
+Каждое чтение или запись Range.value считается отдельно: столько же
+COM-вызовов сделал бы тот же код при работе с настоящим Excel.
+"""
+
+
+class CallCounter:
+    def __init__(self):
+        self.reads = 0
+        self.writes = 0
+
+    def reset(self):
+        self.reads = 0
+        self.writes = 0
+
+    def stats(self) -> dict:
+        return {"reads": self.reads, "writes": self.writes}
+
+
+class FakeRange:
+    def __init__(self, sheet, first: tuple, last: tuple = None):
+        self.sheet = sheet
+        self.first = first
+        self.last = last or first
+        self.ndim = None
+
+    def options(self, ndim=None, **kwargs):
+        self.ndim = ndim
+        return self
+
+    @property
+    def value(self):
+        self.sheet.counter.reads += 1
+        (first_row, first_col), (last_row, last_col) = self.first, self.last
+        rows = [
+            [self.sheet.cells.get((row, col)) for col in range(first_col, last_col + 1)]
+            for row in range(first_row, last_row + 1)
+        ]
+        # Как и xlwings, без ndim=2 одна ячейка - скаляр, одна строка или столбец - список
+        if self.ndim == 2:
+            return rows
+        if first_row == last_row and first_col == last_col:
+            return rows[0][0]
+        if first_row == last_row:
+            return rows[0]
+        if first_col == last_col:
+            return [row[0] for row in rows]
+        return rows
+
+    @value.setter
+    def value(self, value):
+        self.sheet.counter.writes += 1
+        if not isinstance(value, (list, tuple)):
+            value = [[value]]
+        elif value and not isinstance(value[0], (list, tuple)):
+            value = [value]
+        first_row, first_col = self.first
+        for row_offset, row in enumerate(value):
+            for col_offset, cell_value in enumerate(row):
+                self.sheet.set(first_row + row_offset, first_col + col_offset, cell_value)
+
+
+class FakeSheet:
+    def __init__(self, name: str = "Sheet1", counter: CallCounter = None):
+        self.name = name
+        self.counter = counter or CallCounter()
+        self.cells = {}
+
+    def range(self, first: tuple, last: tuple = None) -> FakeRange:
+        return FakeRange(self, first, last)
+
+    def set(self, row: int, col: int, value):
+        """Записывает ячейку без учета вызова (для подготовки листа)"""
+        if isinstance(value, int) and not isinstance(value, bool):
+            value = float(value)
+        if value is None:
+            self.cells.pop((row, col), None)
+        else:
+            self.cells[(row, col)] = value
+
+
+class FakeBook:
+    def __init__(self, app, path: str, sheets: dict):
+        self.app = app
+        self.path = path
+        self.sheets = sheets
+        self.saves = 0
+
+    def save(self):
+        self.saves += 1
+
+    def close(self):
+        if self in self.app.books:
+            self.app.books.remove(self)
+
+
+class FakeBooks(list):
+    def __init__(self, app):
+        super().__init__()
+        self.app = app
+
+    def open(self, path: str) -> FakeBook:
+        if self.app.quitted:
+            raise RuntimeError("Excel завершен")
+        book = FakeBook(self.app, path, self.app.workbooks.get(path, {}))
+        self.append(book)
+        return book
+
+
+class FakeApp:
+    """Запущенный Excel. workbooks - {путь: {имя листа: FakeSheet}}
+
+    После crash() любое обращение к books завершается ошибкой, как у
+    зависшего или закрытого пользователем Excel.
+    """
+
+    def __init__(self, workbooks: dict = None, visible=False, add_book=False):
+        self.workbooks = workbooks or {}
+        self._books = FakeBooks(self)
+        self.quitted = False
+        self.crashed = False
+
+    @property
+    def books(self) -> FakeBooks:
+        if self.crashed:
+            raise RuntimeError("Excel не отвечает")
+        return self._books
+
+    def crash(self):
+        self.crashed = True
+
+    def quit(self):
+        self.quitted = True
+        self._books.clear()
@@ -0,0 +1,100 @@
+"""Пик памяти по этапам на большой синтетической выгрузке.
+
+Генерирует CSV-выгрузку на несколько миллионов строк и прогоняет ее через
+потоковую обработку и через обработку целиком в памяти, затем строит и
+записывает план в лист-заглушку. Если пик памяти этапа (tracemalloc) или
+память процесса превышают бюджет, завершается с кодом 1. Время этапов
+из-за tracemalloc в несколько раз больше обычного, для замеров скорости
+есть bench_pipeline.
+
+Запуск из корня проекта:
+    python -m benchmarks.stress_memory --rows 3000000 --budget-mb 1500
+"""
+import argparse
+import logging
+import sys
+import tempfile
+from pathlib import Path
+import pandas as pd
+from core.aggregation import build_run_context, build_streaming_context
+from core.input_reader import categorize_keys, read_csv_chunks
+from core.metrics import RunMetrics
+from core.report_updater import build_write_plan, configured_area
+from core.workbook import SheetSnapshot, XlwingsSheet
+from core.write_plan import apply_plan
+from benchmarks.bench_pipeline import prepare_config
+from benchmarks.synthetic import make_config, make_report_sheet, write_export_csv
+
+
+def run_stages(csv_path: Path, config: dict, rows: int, day: int) -> RunMetrics:
+    metrics = RunMetrics(track_memory=True)
+
+    with metrics.span("read_input+process_data (потоково)"):
+        build_streaming_context(read_csv_chunks(csv_path, config), config)
+
+    with metrics.span("read_input (целиком)"):
+        whole = dict(config, csv_chunk_rows=max(rows, 1))
+        source_df = categorize_keys(pd.concat(read_csv_chunks(csv_path, whole), ignore_index=True), config)
+    with metrics.span("process_data"):
+        context = build_run_context(source_df, config)
+    del source_df
+
+    sheet = XlwingsSheet(make_report_sheet(config))
+    with metrics.span("snapshot"):
+        snapshot = SheetSnapshot.read(sheet, *configured_area(config))
+    with metrics.span("plan"):
+        plan = build_write_plan(snapshot, context, day, "Sheet1", config)
+    with metrics.span("write"):
+        apply_plan(sheet, plan)
+    metrics.finish()
+    return metrics
+
+
+def check_budget(metrics: RunMetrics, budget_mb: float, rss_budget_mb: float = None) -> list:
+    errors = []
+    for stage, memory in metrics.memory.items():
+        if memory["peak_mb"] > budget_mb:
+            errors.append(f"{stage}: пик {memory['peak_mb']:.1f} МБ при бюджете {budget_mb:g} МБ")
+        if rss_budget_mb and memory["rss_mb"] and memory["rss_mb"] > rss_budget_mb:
+            errors.append(f"{stage}: память процесса {memory['rss_mb']:.1f} МБ при бюджете {rss_budget_mb:g} МБ")
+    return errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Стресс-тест памяти на большой выгрузке")
+    parser.add_argument("--rows", type=int, default=3_000_000)
+    parser.add_argument("--managers", type=int, default=500)
+    parser.add_argument("--regions", type=int, default=200)
+    parser.add_argument("--points", type=int, default=5000)
+    parser.add_argument("--sectors", type=int, default=30)
+    parser.add_argument("--day", type=int, default=15)
+    parser.add_argument("--budget-mb", type=float, default=2048, help="предел пика памяти Python на этап")
+    parser.add_argument("--rss-budget-mb", type=float, help="предел памяти процесса")
+    parser.add_argument("--csv", help="готовая выгрузка (иначе генерируется во временном каталоге)")
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.ERROR)
+    config = prepare_config(make_config(args.managers, args.regions, args.points, args.sectors))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        csv_path = Path(args.csv) if args.csv else write_export_csv(config, Path(temp_dir) / "export.csv", args.rows)
+        size_mb = csv_path.stat().st_size / 1024 / 1024
+        metrics = run_stages(csv_path, config, args.rows, args.day)
+
+    print(f"Строк: {args.rows}, размер выгрузки: {size_mb:.0f} МБ, всего {metrics.total:.1f} с")
+    for stage, seconds in metrics.stages.items():
+        memory = metrics.memory[stage]
+        rss = f"{memory['rss_mb']:8.1f}" if memory["rss_mb"] is not None else "       -"
+        print(f"{stage:38} {seconds:7.2f} с  пик {memory['peak_mb']:8.1f} МБ  "
+              f"прирост {memory['growth_mb']:8.1f} МБ  процесс {rss} МБ")
+
+    errors = check_budget(metrics, args.budget_mb, args.rss_budget_mb)
+    if errors:
+        print("Превышен бюджет памяти:", file=sys.stderr)
+        for error in errors:
+            print(f"  {error}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Синтетические конфигурации, выгрузки и листы отчета для бенчмарков.
+
+Конфигурация строится из config.json проекта: названия столбцов и таблиц
+сохраняются, а справочники менеджеров, регионов и пунктов дополняются
+сгенерированными значениями до нужного размера.
+"""
+import copy
+import json
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from core.input_reader import csv_options
+from core.report_updater import column_letter_to_index
+from benchmarks.fake_excel import FakeSheet
+
+BASE_CONFIG = Path(__file__).resolve().parent.parent / "config.json"
+# Буквы без символов, которые normalize_string заменяет, и без ё
+LETTERS = "бвгдзилнфцчшщэюя"
+# Доли строк выгрузки с неизвестным менеджером и с префиксом "ПП " у пункта
+UNKNOWN_SHARE = 0.01
+PREFIX_SHARE = 0.2
+
+
+def word(index: int, prefix: str) -> str:
+    letters = ""
+    while True:
+        index, rest = divmod(index, len(LETTERS))
+        letters += LETTERS[rest]
+        if not index:
+            return prefix + letters
+
+
+def load_base_config(path=BASE_CONFIG) -> dict:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_config(managers: int = 200, regions: int = 100, points: int = 1000, sectors: int = 20,
+                base: dict = None) -> dict:
+    config = copy.deepcopy(base or load_base_config())
+    sector_names = [f"Сектор {word(i, 'С')}" for i in range(sectors)]
+    config["manager_mapping"] = {
+        word(i, "Ме").capitalize(): sector_names[i % sectors] for i in range(managers)
+    }
+    config["region_mapping"] = {
+        f"Область {word(i, 'о')}": sector_names[i % sectors] for i in range(regions)
+    }
+    point_names = [f"ТП{i:05d}" for i in range(points)]
+
+    row = config["region_tables"][0]["day_row"]
+    for table in config["region_tables"]:
+        table["day_row"] = row
+        table["data_start_row"] = row + 1
+        table["data_end_row"] = row + sectors
+        row += sectors + 4
+    for table in config["new_points_tables"]:
+        table["start_row"] = row
+        table["end_row"] = row + points - 1
+        table["point_names"] = list(point_names)
+        row += points + 4
+    return config
+
+
+def make_export(config: dict, rows: int, seed: int = 0) -> pd.DataFrame:
+    """Выгрузка со столбцами source_columns в том виде, как она читается из Excel"""
+    rng = np.random.default_rng(seed)
+    columns = config["source_columns"]
+    managers = np.array([f"{name} Иван Петрович" for name in config["manager_mapping"]] + ["Неизвестный И.И."],
+                        dtype=object)
+    manager_codes = rng.integers(0, len(managers) - 1, rows)
+    manager_codes[rng.random(rows) < UNKNOWN_SHARE] = len(managers) - 1
+
+    point_names = config["new_points_tables"][0]["point_names"]
+    points = np.array(point_names + [f"ПП {name}" for name in point_names], dtype=object)
+    point_codes = rng.integers(0, len(point_names), rows)
+    point_codes[rng.random(rows) < PREFIX_SHARE] += len(point_names)
+
+    regions = np.array(list(config["region_mapping"]), dtype=object)
+    return pd.DataFrame({
+        columns["region"]: regions[rng.integers(0, len(regions), rows)],
+        columns["manager"]: managers[manager_codes],
+        columns["point"]: points[point_codes],
+        columns["bms_sales"]: rng.random(rows).round(3) * 100,
+        columns["fms_sales"]: rng.random(rows).round(3) * 10,
+    })
+
+
+def write_export_csv(config: dict, path, rows: int, chunk_rows: int = 500_000) -> Path:
+    """Записывает выгрузку в CSV порциями, чтобы генерация не занимала много памяти"""
+    path = Path(path)
+    options = csv_options(config)
+    for number, start in enumerate(range(0, rows, chunk_rows)):
+        chunk = make_export(config, min(chunk_rows, rows - start), seed=number)
+        chunk.to_csv(path, mode='w' if number == 0 else 'a', header=number == 0, index=False, **options)
+    return path
+
+
+def make_report_sheet(config: dict, name: str = "Sheet1") -> FakeSheet:
+    """Лист отчета с заголовками дней и подписями строк для всех таблиц из конфигурации"""
+    sheet = FakeSheet(name)
+    if config.get("grouping_method", "region") == "manager":
+        groups = sorted(set(config["manager_mapping"].values()))
+    else:
+        groups = sorted(set(config["region_mapping"].values()))
+    for table in config["region_tables"]:
+        region_col = column_letter_to_index(table["region_col"])
+        day_start = column_letter_to_index(table["day_start_col"])
+        for day in range(1, 32):
+            sheet.set(table["day_row"], day_start + day - 1, day)
+        for offset, row in enumerate(range(table["data_start_row"], table["data_end_row"] + 1)):
+            sheet.set(row, region_col, groups[offset % len(groups)])
+    for table in config["new_points_tables"]:
+        point_col = column_letter_to_index(table["point_col"])
+        for name, row in zip(table["point_names"], range(table["start_row"], table["end_row"] + 1)):
+            sheet.set(row, point_col, name)
+    return sheet
@@ -0,0 +1,2 @@
+# Корень проекта добавляется в sys.path, чтобы тесты импортировали core и benchmarks
+# и при запуске через "pytest tests", а не только через "python -m pytest"
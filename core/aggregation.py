@@ -0,0 +1,220 @@
+import logging
+import math
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+from core.compiled_config import normalized_manager_mapping
+from core.normalizer import extract_surname_series, normalize_series
+from core.suggestions import SuggestionIndex, log_suggestions, suggestion_index
+
+SALES_TYPES = ("bms", "fms")
+
+# Префиксы, с которыми пункт может встречаться в выгрузке ("ПП НМУС1" для "НМУС1")
+POINT_PREFIXES = ("пп ",)
+
+
+def sales_type(table_config: dict) -> str:
+    return "bms" if table_config["type"] == "bms" else "fms"
+
+
+def check_source_columns(df: pd.DataFrame, config: dict):
+    missing_columns = [col for col in config["source_columns"].values() if col not in df.columns]
+    if missing_columns:
+        raise KeyError(f"Отсутствуют столбцы в исходных данных: {', '.join(missing_columns)}")
+
+
+def _report_unknown(message: str, values, unknown: dict = None, config: dict = None, kind: str = None):
+    if unknown is not None:
+        unknown.update(dict.fromkeys(values))
+    elif len(values) > 0:
+        logging.warning(f"{message}: {', '.join(map(str, values))}")
+        if config is not None:
+            log_suggestions(values, suggestion_index(config, kind))
+
+
+def map_managers(df: pd.DataFrame, config: dict, unknown: dict = None) -> pd.Series:
+    """Сектор для каждой строки выгрузки по фамилии регионального менеджера.
+
+    Нераспознанные фамилии попадают в предупреждение или, если передан
+    словарь unknown, добавляются в него ключами.
+    """
+    surnames = extract_surname_series(df[config["source_columns"]["manager"]])
+    sectors = normalize_series(surnames).map(normalized_manager_mapping(config))
+    _report_unknown("Не распознаны менеджеры", surnames[sectors.isna()].unique(), unknown, config, "managers")
+    return sectors
+
+
+def map_regions(df: pd.DataFrame, config: dict, unknown: dict = None) -> pd.Series:
+    """Сектор для каждой строки выгрузки по региону"""
+    regions = df[config["source_columns"]["region"]]
+    # Маппинг регионов необязателен при группировке по менеджерам
+    sectors = regions.map(config.get("region_mapping", {}))
+    if isinstance(sectors.dtype, pd.CategoricalDtype):
+        sectors = sectors.astype(object)
+    _report_unknown("Не распознаны регионы", regions[sectors.isna()].unique(), unknown, config, "regions")
+    return sectors
+
+
+def _exact_parts(values: list) -> list:
+    """Представляет точную сумму значений двумя числами (старшая часть и остаток)"""
+    total = math.fsum(values)
+    return [total, math.fsum(values + [-total])]
+
+
+def canonical_point(key: str) -> str:
+    """Название пункта без префикса ("пп нмус1" -> "нмус1")"""
+    for prefix in POINT_PREFIXES:
+        if key.startswith(prefix) and len(key) > len(prefix):
+            return key[len(prefix):]
+    return key
+
+
+class PointIndex:
+    """Индекс пунктов выгрузки: каноническое название -> суммы продаж.
+
+    Строки выгрузки с одинаковым пунктом суммируются, в том числе
+    записанные с префиксом и без него ("ПП НМУС1" и "НМУС1"). Запрос тоже
+    приводится к каноническому названию, поэтому поиск занимает O(1)
+    независимо от размера выгрузки и от того, как были получены суммы.
+    """
+
+    def __init__(self, totals: dict):
+        variants = {}
+        for key, key_totals in totals.items():
+            variants.setdefault(canonical_point(key), []).append(key_totals)
+        self.totals = MappingProxyType({
+            key: group[0] if len(group) == 1 else MappingProxyType({
+                kind: math.fsum(key_totals[kind] for key_totals in group) for kind in SALES_TYPES
+            })
+            for key, group in variants.items()
+        })
+        self._suggestions = None
+
+    def suggestions(self) -> SuggestionIndex:
+        """Индекс похожих названий пунктов выгрузки, строится при первом обращении"""
+        if self._suggestions is None:
+            self._suggestions = SuggestionIndex(self.totals)
+        return self._suggestions
+
+    def __len__(self) -> int:
+        return len(self.totals)
+
+    def lookup(self, point_key: str):
+        return self.totals.get(canonical_point(point_key))
+
+
+class RunContext:
+    """Агрегаты выгрузки, общие для всех таблиц одного запуска.
+
+    Содержит суммы ЛЧМ и ЛЦМ по секторам (через менеджеров), по регионам
+    и по пунктам. Каждое значение - неизменяемое отображение
+    {"bms": сумма, "fms": сумма}.
+    """
+
+    def __init__(self, sectors: dict, regions: dict, points: dict, grouping_method: str = "region"):
+        self.sectors = MappingProxyType(sectors)
+        self.regions = MappingProxyType(regions)
+        self.points = PointIndex(points)
+        self.grouping_method = grouping_method
+
+    @property
+    def group_totals(self):
+        """Суммы для таблиц по секторам согласно методу группировки"""
+        return self.sectors if self.grouping_method == "manager" else self.regions
+
+
+class TotalsAccumulator:
+    """Накопитель сумм по секторам, регионам и пунктам для частей выгрузки.
+
+    Части (всю таблицу или порции CSV) можно добавлять по одной. Суммы
+    групп хранятся как короткие списки частичных сумм и сворачиваются через
+    math.fsum, поэтому результат не зависит от разбиения на порции и
+    совпадает для потоковой обработки и обработки в памяти.
+    """
+
+    VIEWS = ("sectors", "regions", "points")
+    # Сколько частичных сумм хранится на группу до их сворачивания
+    MAX_PARTS = 64
+
+    def __init__(self, config: dict):
+        self.config = config
+        self.grouping_method = config.get("grouping_method", "region")
+        if self.grouping_method not in ("manager", "region"):
+            raise ValueError(f"Неизвестный метод группировки: {self.grouping_method}")
+        self.rows = 0
+        self.unknown_managers = {}
+        self.unknown_regions = {}
+        self._parts = {view: {} for view in self.VIEWS}
+
+    def add(self, df: pd.DataFrame):
+        """Добавляет часть выгрузки с уже нормализованными названиями столбцов"""
+        check_source_columns(df, self.config)
+        source_cols = self.config["source_columns"]
+        sales = [
+            np.nan_to_num(df[source_cols[f"{kind}_sales"]].to_numpy(dtype=float))
+            for kind in SALES_TYPES
+        ]
+        keys = {
+            "sectors": map_managers(df, self.config, self.unknown_managers),
+            "regions": map_regions(df, self.config, self.unknown_regions),
+            "points": normalize_series(df[source_cols["point"]]),
+        }
+        for view, view_keys in keys.items():
+            self._add_view(self._parts[view], view_keys.to_numpy(), sales)
+        self.rows += len(df)
+
+    def _add_view(self, parts: dict, keys: np.ndarray, sales: list):
+        codes, uniques = pd.factorize(keys)
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+        starts = np.concatenate(([0], bounds))
+        ends = np.concatenate((bounds, [len(sorted_codes)]))
+        sorted_sales = [values[order] for values in sales]
+        for start, end in zip(starts, ends):
+            code = sorted_codes[start] if end > start else -1
+            # Строки без ключа (код -1) в группы не попадают
+            if code < 0:
+                continue
+            group = parts.setdefault(uniques[code], [[] for _ in SALES_TYPES])
+            for kind_parts, values in zip(group, sorted_sales):
+                kind_parts.extend(_exact_parts(values[start:end].tolist()))
+                if len(kind_parts) > self.MAX_PARTS:
+                    kind_parts[:] = _exact_parts(kind_parts)
+
+    def _totals(self, view: str) -> dict:
+        return {
+            key: MappingProxyType({kind: math.fsum(kind_parts) for kind, kind_parts in zip(SALES_TYPES, group)})
+            for key, group in self._parts[view].items()
+        }
+
+    def context(self) -> RunContext:
+        if self.grouping_method == "manager":
+            _report_unknown("Не распознаны менеджеры", list(self.unknown_managers), config=self.config, kind="managers")
+        else:
+            _report_unknown("Не распознаны регионы", list(self.unknown_regions), config=self.config, kind="regions")
+        return RunContext(
+            sectors=self._totals("sectors"),
+            regions=self._totals("regions"),
+            points=self._totals("points"),
+            grouping_method=self.grouping_method,
+        )
+
+
+def build_run_context(source_df: pd.DataFrame, config: dict) -> RunContext:
+    """Строит все агрегаты за один проход по выгрузке без копирования исходных данных.
+
+    Ожидает, что названия столбцов уже нормализованы.
+    """
+    accumulator = TotalsAccumulator(config)
+    accumulator.add(source_df)
+    return accumulator.context()
+
+
+def build_streaming_context(chunks, config: dict) -> RunContext:
+    """Строит агрегаты по порциям выгрузки, не держа ее целиком в памяти"""
+    accumulator = TotalsAccumulator(config)
+    for chunk in chunks:
+        accumulator.add(chunk)
+    logging.info(f"Обработано строк: {accumulator.rows}")
+    return accumulator.context()
@@ -0,0 +1,102 @@
+import copy
+import json
+import logging
+from pathlib import Path
+from types import MappingProxyType
+from core.normalizer import NORMALIZE_CACHE
+
+REGION_TABLE_COLUMNS = ("region_col", "day_start_col", "day_end_col")
+POINTS_TABLE_COLUMNS = ("point_col", "data_col")
+
+
+def column_letter_to_index(column_letter: str) -> int:
+    index = 0
+    for char in column_letter.upper():
+        if not char.isalpha():
+            raise ValueError(f"Недопустимый символ в обозначении столбца: {column_letter}")
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index
+
+
+def _table_columns(table_config: dict, keys: tuple) -> MappingProxyType:
+    return MappingProxyType({key: column_letter_to_index(table_config[key]) for key in keys})
+
+
+def _point_keys(table_config: dict) -> frozenset:
+    return frozenset(NORMALIZE_CACHE(name) for name in table_config.get("point_names", []))
+
+
+class CompiledConfig(dict):
+    """Конфигурация, подготовленная к запуску.
+
+    Это обычный словарь настроек с уже нормализованными source_columns,
+    который дополнительно хранит нормализованный маппинг менеджеров, номера
+    столбцов таблиц и множества нормализованных пунктов. Производные данные
+    привязаны к объектам таблиц, поэтому после создания конфигурацию
+    не изменяют, а компилируют заново.
+    """
+
+    def __init__(self, config: dict, path: Path = None, mtime_ns: int = None):
+        super().__init__(copy.deepcopy(config))
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self["source_columns"] = {key: NORMALIZE_CACHE(value) for key, value in self["source_columns"].items()}
+        self.normalized_manager_mapping = MappingProxyType({
+            NORMALIZE_CACHE(key): value for key, value in self.get("manager_mapping", {}).items()
+        })
+        self._columns = {}
+        self._point_keys = {}
+        tables = [(table, REGION_TABLE_COLUMNS) for table in self.get("region_tables", [])]
+        tables += [(table, POINTS_TABLE_COLUMNS) for table in self.get("new_points_tables", [])]
+        for table, keys in tables:
+            try:
+                self._columns[id(table)] = _table_columns(table, keys)
+            except (KeyError, ValueError):
+                # Ошибка в описании таблицы будет выведена при ее обновлении
+                pass
+        for table in self.get("new_points_tables", []):
+            self._point_keys[id(table)] = _point_keys(table)
+        # Индексы подсказок строятся при первом промахе (core.suggestions)
+        self.suggestion_indexes = {}
+
+
+def compile_config(config: dict) -> CompiledConfig:
+    if isinstance(config, CompiledConfig):
+        return config
+    return CompiledConfig(config)
+
+
+def normalized_manager_mapping(config: dict):
+    if isinstance(config, CompiledConfig):
+        return config.normalized_manager_mapping
+    return {NORMALIZE_CACHE(key): value for key, value in config.get("manager_mapping", {}).items()}
+
+
+def table_columns(config: dict, table_config: dict, keys: tuple):
+    """Номера столбцов таблицы по ключам keys (REGION_TABLE_COLUMNS или POINTS_TABLE_COLUMNS)"""
+    if isinstance(config, CompiledConfig) and id(table_config) in config._columns:
+        return config._columns[id(table_config)]
+    return _table_columns(table_config, keys)
+
+
+def point_keys(config: dict, table_config: dict) -> frozenset:
+    if isinstance(config, CompiledConfig) and id(table_config) in config._point_keys:
+        return config._point_keys[id(table_config)]
+    return _point_keys(table_config)
+
+
+_LOADED = {}
+
+
+def load_compiled_config(path) -> CompiledConfig:
+    """Компилирует файл конфигурации; пока файл не изменился, возвращается готовый объект"""
+    path = Path(path).resolve()
+    mtime_ns = path.stat().st_mtime_ns
+    compiled = _LOADED.get(path)
+    if compiled is not None and compiled.mtime_ns == mtime_ns:
+        logging.info(f"Конфигурация не изменилась: {path}")
+        return compiled
+    with open(path, 'r', encoding='utf-8') as f:
+        compiled = CompiledConfig(json.load(f), path, mtime_ns)
+    _LOADED[path] = compiled
+    return compiled
@@ -60,6 +60,12 @@ def validate_config(config: dict) -> list:
             if column not in config["source_columns"]:
                 errors.append(f"Отсутствует обязательный столбец в source_columns: {column}")
     
+    if config.get("excel_backend", "xlwings") not in ("xlwings", "openpyxl"):
+        errors.append(f"Неизвестный движок Excel: {config['excel_backend']}")
+    
+    if config.get("write_mode", "all") not in ("all", "changed"):
+        errors.append(f"Неизвестный режим записи: {config['write_mode']}")
+    
     for table_type in ["region_tables", "new_points_tables"]:
         if table_type in config:
             for i, table in enumerate(config[table_type]):
@@ -145,6 +151,8 @@ def create_default_config():
     "fms_sales": "ЛЦМ Приём"
   },
   "grouping_method": "manager",
+  "excel_backend": "xlwings",
+  "write_mode": "all",
   "manager_mapping": {
     "Абдукундузов": "Новосибирский (НС)",
     "Горбанев": "Новосибирский (НС)",
@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import sqlite3
+import sys
+from contextlib import closing
+from datetime import date, datetime
+from pathlib import Path
+from core.aggregation import SALES_TYPES, RunContext
+from core.normalizer import NORMALIZER_VERSION
+
+DEFAULT_STORE_FILE = "data/aggregates.sqlite"
+VIEWS = ("sectors", "regions", "points")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS days (
+    period TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    config_signature TEXT NOT NULL,
+    input_file TEXT,
+    created_at TEXT NOT NULL,
+    PRIMARY KEY (period, day)
+);
+CREATE TABLE IF NOT EXISTS aggregates (
+    period TEXT NOT NULL,
+    day INTEGER NOT NULL,
+    view TEXT NOT NULL,
+    key TEXT NOT NULL,
+    bms REAL NOT NULL,
+    fms REAL NOT NULL,
+    PRIMARY KEY (period, day, view, key)
+);
+"""
+
+
+def current_period() -> str:
+    return date.today().strftime("%Y-%m")
+
+
+def check_period(period: str) -> str:
+    """Период в виде ГГГГ-ММ ("2024-3" приводится к "2024-03")"""
+    try:
+        return datetime.strptime(period, "%Y-%m").strftime("%Y-%m")
+    except (TypeError, ValueError):
+        raise ValueError(f"Период должен быть в формате ГГГГ-ММ: {period}")
+
+
+def config_signature(config: dict) -> str:
+    """Хэш настроек, от которых зависят агрегаты одного дня"""
+    settings = json.dumps(
+        [NORMALIZER_VERSION, config["source_columns"], config.get("manager_mapping", {}),
+         config.get("region_mapping", {})],
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(settings.encode('utf-8')).hexdigest()[:16]
+
+
+class AggregateStore:
+    """Хранилище агрегатов по дням в SQLite.
+
+    Для каждого периода (месяц в формате ГГГГ-ММ) и дня хранятся суммы
+    ЛЧМ и ЛЦМ по секторам, регионам и пунктам, а также отпечаток входного
+    файла, по которому они посчитаны.
+    """
+
+    def __init__(self, path, read_only: bool = False):
+        self.path = Path(path)
+        self.read_only = read_only
+        if read_only:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self.read_only:
+            return sqlite3.connect(f"{self.path.resolve().as_uri()}?mode=ro", uri=True)
+        return sqlite3.connect(self.path)
+
+    def save_day(self, period: str, day: int, fingerprint: str, context: RunContext,
+                 config: dict, input_file: str = None):
+        rows = [
+            (period, day, view, key, totals["bms"], totals["fms"])
+            for view in VIEWS
+            for key, totals in _view_totals(context, view).items()
+        ]
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM aggregates WHERE period = ? AND day = ?", (period, day))
+            conn.execute("DELETE FROM days WHERE period = ? AND day = ?", (period, day))
+            conn.execute(
+                "INSERT INTO days VALUES (?, ?, ?, ?, ?, ?)",
+                (period, day, fingerprint, config_signature(config), input_file,
+                 datetime.now().isoformat(timespec="seconds")),
+            )
+            conn.executemany("INSERT INTO aggregates VALUES (?, ?, ?, ?, ?, ?)", rows)
+        logging.info(f"Агрегаты за {period}, день {day} сохранены в хранилище")
+
+    def day_info(self, period: str, day: int):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT fingerprint, config_signature, input_file, created_at FROM days "
+                "WHERE period = ? AND day = ?", (period, day),
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("fingerprint", "config_signature", "input_file", "created_at"), row))
+
+    def days(self, period: str) -> list:
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute(
+                "SELECT day FROM days WHERE period = ? ORDER BY day", (period,)
+            )]
+
+    def load_day(self, period: str, day: int, config: dict, fingerprint: str = None):
+        """Агрегаты дня из хранилища или None.
+
+        Если передан fingerprint, данные возвращаются только когда они
+        посчитаны по тому же файлу и с теми же маппингами.
+        """
+        info = self.day_info(period, day)
+        if info is None:
+            return None
+        if fingerprint is not None and (info["fingerprint"] != fingerprint
+                                        or info["config_signature"] != config_signature(config)):
+            return None
+        return self._context(period, "day = ?", (day,), config)
+
+    def month_to_date(self, period: str, day: int, config: dict) -> RunContext:
+        """Суммы с начала месяца по указанный день включительно"""
+        return self._context(period, "day <= ?", (day,), config)
+
+    def _context(self, period: str, condition: str, params: tuple, config: dict) -> RunContext:
+        parts = {view: {} for view in VIEWS}
+        with closing(self._connect()) as conn:
+            cursor = conn.execute(
+                f"SELECT view, key, bms, fms FROM aggregates WHERE period = ? AND {condition}",
+                (period,) + params,
+            )
+            for view, key, bms, fms in cursor:
+                group = parts[view].setdefault(key, ([], []))
+                group[0].append(bms)
+                group[1].append(fms)
+        totals = {
+            view: {
+                key: {kind: math.fsum(values) for kind, values in zip(SALES_TYPES, group)}
+                for key, group in groups.items()
+            }
+            for view, groups in parts.items()
+        }
+        return RunContext(
+            sectors=totals["sectors"],
+            regions=totals["regions"],
+            points=totals["points"],
+            grouping_method=config.get("grouping_method", "region"),
+        )
+
+
+def _view_totals(context: RunContext, view: str):
+    if view == "points":
+        return context.points.totals
+    return getattr(context, view)
+
+
+def open_store(config: dict, read_only: bool = False):
+    """Хранилище из настройки aggregate_store или None, если оно отключено.
+
+    Только для чтения хранилище открывается, лишь если файл уже существует.
+    """
+    path = config.get("aggregate_store", DEFAULT_STORE_FILE)
+    if not path or (read_only and not Path(path).is_file()):
+        return None
+    return AggregateStore(path, read_only)
+
+
+def context_to_dict(context: RunContext) -> dict:
+    return {view: {key: dict(totals) for key, totals in _view_totals(context, view).items()} for view in VIEWS}
+
+
+def main():
+    from core.report_updater import load_config
+
+    parser = argparse.ArgumentParser(description="Запросы к хранилищу агрегатов по дням")
+    parser.add_argument("command", choices=["days", "day", "month-to-date"])
+    parser.add_argument("--period", default=current_period(), help="месяц в формате ГГГГ-ММ")
+    parser.add_argument("--day", type=int, default=31, help="день (для month-to-date - по какой включительно)")
+    args = parser.parse_args()
+
+    config = load_config()
+    store = open_store(config)
+    if store is None:
+        logging.error("Хранилище агрегатов отключено в конфигурации")
+        sys.exit(1)
+
+    if args.command == "days":
+        result = store.days(args.period)
+    elif args.command == "day":
+        context = store.load_day(args.period, args.day, config)
+        if context is None:
+            logging.error(f"В хранилище нет данных за {args.period}, день {args.day}")
+            sys.exit(1)
+        result = context_to_dict(context)
+    else:
+        result = context_to_dict(store.month_to_date(args.period, args.day, config))
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+DEFAULT_IDLE_TIMEOUT = 300
+
+
+def default_app_factory():
+    import xlwings as xw
+
+    return xw.App(visible=False, add_book=False)
+
+
+class ExcelAppPool:
+    """Пул запущенных скрытых экземпляров Excel, переиспользуемых между запусками.
+
+    Экземпляры создаются через app_factory (по умолчанию xlwings.App), что
+    позволяет подставить заглушку вместо Excel. COM-объекты нельзя
+    передавать между потоками, поэтому все методы пула должны вызываться
+    из одного и того же рабочего потока.
+    """
+
+    def __init__(self, app_factory=None, max_size: int = 1, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 clock=time.monotonic):
+        self.app_factory = app_factory or default_app_factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.clock = clock
+        self._idle = []  # [(app, время освобождения)]
+        self._busy = set()
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self):
+        """Возвращает исправный простаивающий экземпляр или запускает новый"""
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                app, _ = self._idle.pop()
+            if self.is_healthy(app):
+                self.reused += 1
+                with self._lock:
+                    self._busy.add(app)
+                return app
+            logging.warning("Экземпляр Excel не отвечает и будет перезапущен")
+            self._quit(app)
+
+        app = self.app_factory()
+        self.created += 1
+        logging.info("Запущен новый экземпляр Excel")
+        with self._lock:
+            self._busy.add(app)
+        return app
+
+    def release(self, app):
+        """Возвращает экземпляр в пул, закрыв оставшиеся в нем книги"""
+        with self._lock:
+            self._busy.discard(app)
+        try:
+            for book in list(app.books):
+                book.close()
+        except Exception as e:
+            logging.warning(f"Не удалось закрыть книги Excel: {e}")
+            self._quit(app)
+            return
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((app, self.clock()))
+                return
+        self._quit(app)
+
+    @staticmethod
+    def is_healthy(app) -> bool:
+        try:
+            len(app.books)
+            return True
+        except Exception:
+            return False
+
+    def close_idle(self) -> int:
+        """Завершает экземпляры, простаивающие дольше idle_timeout"""
+        now = self.clock()
+        with self._lock:
+            expired = [app for app, released in self._idle if now - released >= self.idle_timeout]
+            self._idle = [(app, released) for app, released in self._idle if app not in expired]
+        for app in expired:
+            logging.info("Простаивающий экземпляр Excel завершен")
+            self._quit(app)
+        return len(expired)
+
+    def shutdown(self):
+        """Завершает все экземпляры пула, в том числе занятые"""
+        with self._lock:
+            apps = [app for app, _ in self._idle] + list(self._busy)
+            self._idle = []
+            self._busy = set()
+        for app in apps:
+            self._quit(app)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"idle": len(self._idle), "busy": len(self._busy),
+                    "created": self.created, "reused": self.reused}
+
+    @staticmethod
+    def _quit(app):
+        try:
+            app.quit()
+        except Exception as e:
+            logging.warning(f"Не удалось завершить Excel: {e}")
+
+
+class DaemonExecutor:
+    """Один фоновый поток, выполняющий задачи по очереди.
+
+    Поток - демон: в отличие от ThreadPoolExecutor он не удерживает
+    процесс после закрытия окна, даже если Excel завис и задача так и не
+    завершилась.
+    """
+
+    def __init__(self, name: str = "worker"):
+        self._tasks = queue.Queue()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        if self._stopped:
+            raise RuntimeError("Рабочий поток остановлен")
+        future = Future()
+        self._tasks.put((future, fn, args, kwargs))
+        return future
+
+    def shutdown(self, wait: bool = True):
+        """Останавливает поток после уже поставленных задач"""
+        self._stopped = True
+        self._tasks.put(None)
+        if wait:
+            self._thread.join()
+
+    def _run(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            future, fn, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+import pandas as pd
+from core.input_reader import read_source
+from core.normalizer import NORMALIZER_VERSION
+
+DEFAULT_CACHE_DIR = "cache"
+DEFAULT_MAX_SIZE_MB = 512
+CACHE_SUBDIR = "inputs"
+# Отпечатки входных файлов нужны и хранилищу агрегатов, поэтому лежат
+# в корне каталога кэша и не зависят от настройки input_cache
+INDEX_FILE = "fingerprints.json"
+# Сколько входных файлов помнит индекс отпечатков
+MAX_INDEX_ENTRIES = 1000
+# Увеличивается при изменении формата сохраняемой таблицы
+CACHE_FORMAT_VERSION = 2
+
+
+def input_cache_dir(config: dict) -> Path:
+    return Path(config.get("cache_dir", DEFAULT_CACHE_DIR)) / CACHE_SUBDIR
+
+
+def fingerprint_index_path(config: dict) -> Path:
+    return Path(config.get("cache_dir", DEFAULT_CACHE_DIR)) / INDEX_FILE
+
+
+def _load_index(index_path: Path) -> dict:
+    try:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _prune_index(index: dict) -> dict:
+    """Убирает из индекса удаленные входные файлы и самые старые записи сверх лимита"""
+    entries = [(path, entry) for path, entry in index.items() if Path(path).exists()]
+    return dict(entries[-MAX_INDEX_ENTRIES:])
+
+
+def _save_index(index_path: Path, index: dict):
+    temp_path = index_path.with_name(index_path.name + ".tmp")
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(temp_path, index_path)
+    except OSError as e:
+        # Без индекса файл просто будет хэшироваться при каждом запуске
+        logging.warning(f"Не удалось сохранить индекс отпечатков {index_path}: {e}")
+
+
+def file_fingerprint(input_file: str, index_path: Path = None, update_index: bool = True) -> str:
+    """SHA-256 содержимого файла.
+
+    Хэш запоминается в индексе index_path вместе с размером и mtime файла,
+    поэтому неизмененный файл повторно не читается. С update_index=False
+    индекс только читается.
+    """
+    path = Path(input_file).resolve()
+    stat = path.stat()
+    index = _load_index(index_path) if index_path else {}
+    entry = index.get(str(path))
+    if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+        return entry["sha256"]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    fingerprint = digest.hexdigest()
+
+    if index_path and update_index:
+        # Свежая запись переносится в конец, старые вытесняются первыми
+        index.pop(str(path), None)
+        index[str(path)] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": fingerprint}
+        _save_index(index_path, _prune_index(index))
+    return fingerprint
+
+
+def cache_key(fingerprint: str, config: dict) -> str:
+    # Состав и имена столбцов зависят от source_columns и правил нормализации
+    settings = json.dumps(
+        [CACHE_FORMAT_VERSION, NORMALIZER_VERSION, config["source_columns"]],
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256((fingerprint + settings).encode('utf-8')).hexdigest()[:32]
+
+
+def _import_feather():
+    try:
+        import pyarrow.feather as feather
+    except ImportError:
+        return None
+    return feather
+
+
+def load_source(input_file: str, config: dict, write_cache: bool = True) -> pd.DataFrame:
+    """Читает выгрузку через кэш разобранных файлов.
+
+    Разобранная и нормализованная таблица сохраняется в формате Feather
+    без сжатия одним блоком строк. При повторном запуске на том же файле
+    файл отображается в память вместо повторного разбора Excel: числовые
+    столбцы ссылаются на отображенный файл без копирования, в память
+    процесса копируются только коды категорий ключевых столбцов.
+    Без pyarrow кэш отключен. С write_cache=False уже сохраненная
+    таблица используется, но кэш и индекс отпечатков не изменяются.
+    """
+    feather = _import_feather() if config.get("input_cache", True) else None
+    if feather is None:
+        return read_source(input_file, config)
+
+    cache_dir = input_cache_dir(config)
+    try:
+        if write_cache:
+            cache_dir.mkdir(parents=True, exist_ok=True)
+        fingerprint = file_fingerprint(input_file, fingerprint_index_path(config), write_cache)
+        cache_path = cache_dir / f"{cache_key(fingerprint, config)}.feather"
+    except OSError as e:
+        logging.warning(f"Кэш входных файлов недоступен: {e}")
+        return read_source(input_file, config)
+
+    if cache_path.exists():
+        try:
+            # split_blocks не дает pandas склеивать столбцы в общий блок с копированием
+            df = feather.read_table(cache_path, memory_map=True).to_pandas(split_blocks=True)
+            if write_cache:
+                os.utime(cache_path)
+            logging.info(f"Входной файл загружен из кэша: {cache_path.name}")
+            return df
+        except Exception as e:
+            logging.warning(f"Не удалось прочитать кэш {cache_path}: {e}")
+
+    df = read_source(input_file, config)
+    if not write_cache:
+        return df
+    try:
+        temp_path = cache_path.with_suffix(".tmp")
+        # Один блок строк: столбец из нескольких блоков при чтении пришлось бы склеивать
+        df.reset_index(drop=True).to_feather(temp_path, compression="uncompressed", chunksize=max(len(df), 1))
+        os.replace(temp_path, cache_path)
+        evict_input_cache(config)
+    except Exception as e:
+        logging.warning(f"Не удалось сохранить кэш {cache_path}: {e}")
+    return df
+
+
+def evict_input_cache(config: dict):
+    """Удаляет давно не использованные файлы, пока кэш превышает лимит размера"""
+    cache_dir = input_cache_dir(config)
+    max_size = config.get("input_cache_max_mb", DEFAULT_MAX_SIZE_MB) * 1024 * 1024
+    files = sorted(cache_dir.glob("*.feather"), key=lambda p: p.stat().st_mtime)
+    total = sum(p.stat().st_size for p in files)
+    for path in files:
+        if total <= max_size:
+            break
+        total -= path.stat().st_size
+        path.unlink()
+        logging.info(f"Из кэша входных файлов удален: {path.name}")
+
+
+def clear_input_cache(config: dict) -> int:
+    cache_dir = input_cache_dir(config)
+    removed = 0
+    for path in list(cache_dir.glob("*.feather")) + [fingerprint_index_path(config)]:
+        if path.exists():
+            path.unlink()
+            removed += 1
+    logging.info(f"Кэш входных файлов очищен: {cache_dir}")
+    return removed
@@ -0,0 +1,85 @@
+import logging
+import pandas as pd
+from core.normalizer import NORMALIZE_CACHE
+
+KEY_COLUMNS = ("region", "manager", "point")
+SALES_COLUMNS = ("bms_sales", "fms_sales")
+
+
+def resolve_source_columns(columns, config: dict) -> dict:
+    """Сопоставляет заголовки выгрузки с нужными столбцами из source_columns.
+
+    Возвращает {исходный заголовок: нормализованное имя} только для
+    используемых столбцов. При повторяющихся заголовках берется первый.
+    """
+    wanted = set(config["source_columns"].values())
+    resolved = {}
+    for column in columns:
+        normalized = NORMALIZE_CACHE(column)
+        if normalized in wanted and normalized not in resolved.values():
+            resolved[column] = normalized
+    missing_columns = [col for col in config["source_columns"].values() if col not in resolved.values()]
+    if missing_columns:
+        raise KeyError(f"Отсутствуют столбцы в исходных данных: {', '.join(missing_columns)}")
+    return resolved
+
+
+def source_dtypes(resolved: dict, config: dict) -> dict:
+    sales = {config["source_columns"][key] for key in SALES_COLUMNS}
+    return {
+        column: "float64" if normalized in sales else object
+        for column, normalized in resolved.items()
+    }
+
+
+def categorize_keys(df: pd.DataFrame, config: dict) -> pd.DataFrame:
+    for key in KEY_COLUMNS:
+        column = config["source_columns"][key]
+        df[column] = df[column].astype("category")
+    return df
+
+
+def read_source(input_file: str, config: dict) -> pd.DataFrame:
+    """Читает из выгрузки только столбцы source_columns с явными типами.
+
+    Сначала читается строка заголовков, нужные столбцы находятся через
+    normalize_string, затем загружаются только они: ключи как категории,
+    продажи как float. Столбцы результата названы нормализованными именами.
+    """
+    header = pd.read_excel(input_file, nrows=0)
+    resolved = resolve_source_columns(header.columns, config)
+    df = pd.read_excel(input_file, usecols=list(resolved), dtype=source_dtypes(resolved, config))
+    df = df.rename(columns=resolved)
+    logging.info(f"Прочитано строк: {len(df)}, столбцов: {len(df.columns)} из {len(header.columns)}")
+    return categorize_keys(df, config)
+
+
+DEFAULT_CSV_CHUNK_ROWS = 200_000
+
+
+def csv_options(config: dict) -> dict:
+    # По умолчанию - формат CSV, который выгружает Excel в русской локали
+    return {
+        "sep": config.get("csv_separator", ";"),
+        "encoding": config.get("csv_encoding", "windows-1251"),
+        "decimal": config.get("csv_decimal", ","),
+    }
+
+
+def read_csv_chunks(input_file: str, config: dict):
+    """Читает CSV-выгрузку порциями только по столбцам source_columns.
+
+    Возвращает итератор таблиц с нормализованными названиями столбцов.
+    """
+    options = csv_options(config)
+    header = pd.read_csv(input_file, nrows=0, **options)
+    resolved = resolve_source_columns(header.columns, config)
+    chunks = pd.read_csv(
+        input_file,
+        usecols=list(resolved),
+        dtype=source_dtypes(resolved, config),
+        chunksize=config.get("csv_chunk_rows", DEFAULT_CSV_CHUNK_ROWS),
+        **options,
+    )
+    for chunk in chunks:
+        yield chunk.rename(columns=resolved)
@@ -0,0 +1,120 @@
+import json
+import logging
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_METRICS_DIR = "metrics"
+MB = 1024 * 1024
+
+
+def rss_mb():
+    """Память процесса в МБ: текущая через psutil, без него - пиковая через resource"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        return psutil.Process().memory_info().rss / MB
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss в Linux в килобайтах, в macOS - в байтах
+    return peak / MB if sys.platform == "darwin" else peak / 1024
+
+
+class RunMetrics:
+    """Длительности этапов одного запуска.
+
+    Этапы записываются в порядке завершения; этап с тем же именем,
+    выполненный повторно, добавляется к уже накопленному времени.
+    С track_memory для каждого этапа запоминаются пик памяти Python
+    (tracemalloc) и память процесса после этапа; такие этапы не должны
+    быть вложенными.
+    """
+
+    def __init__(self, track_memory: bool = False):
+        self.started_at = datetime.now()
+        self.stages = {}
+        self.memory = {}
+        self.info = {}
+        self.track_memory = track_memory
+        self._owns_tracemalloc = track_memory and not tracemalloc.is_tracing()
+        if self._owns_tracemalloc:
+            tracemalloc.start()
+        self._started = time.perf_counter()
+        self._finished = None
+
+    @contextmanager
+    def span(self, name: str):
+        if self.track_memory:
+            tracemalloc.reset_peak()
+            traced_at_start = tracemalloc.get_traced_memory()[0]
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+            if self.track_memory:
+                self._record_memory(name, traced_at_start)
+                memory = self.memory[name]
+                logging.info(f"Этап '{name}': {seconds:.3f} с, пик памяти {memory['peak_mb']:.1f} МБ "
+                             f"(+{memory['growth_mb']:.1f} МБ за этап)")
+            else:
+                logging.info(f"Этап '{name}': {seconds:.3f} с")
+
+    def _record_memory(self, name: str, traced_at_start: int):
+        peak = tracemalloc.get_traced_memory()[1]
+        rss = rss_mb()
+        previous = self.memory.get(name, {})
+        # peak_mb - пик всей памяти Python во время этапа, growth_mb - прирост сверх памяти на его начало
+        self.memory[name] = {
+            "peak_mb": round(max(peak / MB, previous.get("peak_mb", 0.0)), 2),
+            "growth_mb": round(max((peak - traced_at_start) / MB, previous.get("growth_mb", 0.0)), 2),
+            "rss_mb": round(rss, 2) if rss is not None else None,
+        }
+
+    def finish(self):
+        self._finished = time.perf_counter()
+        if self._owns_tracemalloc:
+            tracemalloc.stop()
+            self._owns_tracemalloc = False
+
+    @property
+    def total(self) -> float:
+        return (self._finished or time.perf_counter()) - self._started
+
+    def to_dict(self) -> dict:
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "total_seconds": round(self.total, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            **({"memory": self.memory} if self.track_memory else {}),
+            **self.info,
+        }
+
+    def summary(self, limit: int = 6) -> str:
+        """Самые долгие этапы одной строкой, для строки состояния"""
+        slowest = sorted(self.stages.items(), key=lambda item: item[1], reverse=True)[:limit]
+        parts = [f"{name} {seconds:.2f} с" for name, seconds in slowest]
+        return f"Всего {self.total:.2f} с: " + ", ".join(parts)
+
+    def save(self, metrics_dir) -> Path:
+        metrics_dir = Path(metrics_dir)
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        path = metrics_dir / f"run-{self.started_at:%Y%m%d-%H%M%S-%f}.json"
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        logging.info(f"Метрики запуска сохранены в: {path}")
+        return path
+
+
+def span(metrics, name: str):
+    """Этап metrics или пустой контекст, если метрики не собираются"""
+    return metrics.span(name) if metrics is not None else nullcontext()
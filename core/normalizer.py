@@ -0,0 +1,217 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_SIZE = 100_000
+
+# Заменяем схожие символы (на кириллические заглавные, как в вашем примере)
+# Можно использовать и строчные, главное - единообразие
+CHAR_MAP = {
+    # Цифры и похожие буквы
+    '3': 'З',
+    '0': 'О', # Заменяем на заглавную О
+    '6': 'б', # Пример для 6 и б
+    # Латинские и похожие кириллические
+    'a': 'а',
+    'A': 'А', # Не забудьте про заглавные латинские
+    'e': 'е',
+    'E': 'Е',
+    'o': 'о',
+    'O': 'О',
+    'p': 'р',
+    'P': 'Р',
+    'c': 'с',
+    'C': 'С',
+    'y': 'у',
+    'Y': 'У',
+    'x': 'х',
+    'X': 'Х',
+    'k': 'к',
+    'K': 'К',
+    't': 'т',
+    'T': 'Т',
+    'm': 'м',
+    'M': 'М',
+    'h': 'н',
+    'H': 'Н',
+    # Другие похожие буквы
+    'ё': 'е', # Это тоже полезно сделать до lower()
+}
+
+# Ни одна замена не порождает символ, который сам заменяется,
+# поэтому последовательные replace эквивалентны одной таблице translate
+_TRANSLATION = str.maketrans(CHAR_MAP)
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_SPACES_RE = re.compile(r'\s+')
+
+# Меняется при любом изменении правил нормализации и делает старый кэш на диске недействительным
+NORMALIZER_VERSION = hashlib.sha1(
+    json.dumps([CHAR_MAP, _PUNCTUATION_RE.pattern, _SPACES_RE.pattern, 'NFC'], ensure_ascii=False).encode('utf-8')
+).hexdigest()[:12]
+
+
+def normalize_string(s: str) -> str:
+    if not isinstance(s, str):
+        return ""
+
+    s = s.translate(_TRANSLATION).lower()
+
+    # Удаляем знаки препинания (или другие ненужные символы)
+    s = _PUNCTUATION_RE.sub('', s)
+
+    # Нормализуем пробелы
+    s = _SPACES_RE.sub(' ', s).strip()
+
+    # NFC нормализация Unicode
+    return unicodedata.normalize('NFC', s)
+
+
+class NormalizationCache:
+    """Ограниченный LRU-кэш результатов функции нормализации.
+
+    Кэшируются только строковые значения; для остальных функция вызывается
+    напрямую. Счетчики hits/misses показывают эффективность кэша.
+    """
+
+    def __init__(self, func, maxsize: int = DEFAULT_CACHE_SIZE):
+        self.func = func
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def __call__(self, value):
+        if not isinstance(value, str):
+            return self.func(value)
+        try:
+            result = self._data[value]
+        except KeyError:
+            self.misses += 1
+            result = self.func(value)
+            self._store(value, result)
+        else:
+            self.hits += 1
+            self._data.move_to_end(value)
+        return result
+
+    def _store(self, value: str, result: str):
+        self._data[value] = result
+        self._data.move_to_end(value)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def map_series(self, values: pd.Series) -> pd.Series:
+        """Применяет функцию к каждому различному значению столбца один раз"""
+        codes, uniques = pd.factorize(values)
+        # Пропуски получают код -1 и попадают на последний элемент - пустую строку
+        results = np.array([self(value) for value in uniques] + [""], dtype=object)
+        return pd.Series(results[codes], index=values.index, dtype=object)
+
+    def resize(self, maxsize: int):
+        self.maxsize = maxsize
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self):
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def items(self) -> dict:
+        return dict(self._data)
+
+    def update(self, items: dict):
+        for value, result in items.items():
+            self._store(value, result)
+
+
+def normalize_series(values: pd.Series) -> pd.Series:
+    """Версия normalize_string для целого столбца.
+
+    Результат совпадает с values.apply(normalize_string), но каждое
+    различное значение нормализуется только один раз.
+    """
+    return NORMALIZE_CACHE.map_series(values)
+
+
+def extract_surname(full_name: str) -> str:
+    if not isinstance(full_name, str):
+        return ""
+    normalized = normalize_string(full_name)
+    parts = normalized.split()
+    if not parts:
+        return ""
+    surname = ''.join(c for c in parts[0] if c.isalpha())
+    return surname.capitalize()
+
+
+def extract_surname_series(values: pd.Series) -> pd.Series:
+    """Версия extract_surname для целого столбца"""
+    return SURNAME_CACHE.map_series(values)
+
+
+NORMALIZE_CACHE = NormalizationCache(normalize_string)
+SURNAME_CACHE = NormalizationCache(extract_surname)
+_LOADED_CACHE_FILES = set()
+
+
+def load_normalization_cache(path) -> bool:
+    """Загружает сохраненные результаты нормализации с диска.
+
+    Файл, созданный другой версией нормализации, игнорируется.
+    """
+    path = Path(path)
+    if path.resolve() in _LOADED_CACHE_FILES:
+        return True
+    if not path.exists():
+        return False
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        logging.warning(f"Не удалось загрузить кэш нормализации {path}: {e}")
+        return False
+    if data.get("version") != NORMALIZER_VERSION:
+        logging.info("Кэш нормализации создан другой версией и будет перестроен")
+        return False
+    NORMALIZE_CACHE.update(data.get("normalize", {}))
+    SURNAME_CACHE.update(data.get("surname", {}))
+    _LOADED_CACHE_FILES.add(path.resolve())
+    logging.info(f"Кэш нормализации загружен из: {path}")
+    return True
+
+
+def save_normalization_cache(path) -> bool:
+    path = Path(path)
+    data = {
+        "version": NORMALIZER_VERSION,
+        "normalize": NORMALIZE_CACHE.items(),
+        "surname": SURNAME_CACHE.items(),
+    }
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+        return True
+    except Exception as e:
+        logging.warning(f"Не удалось сохранить кэш нормализации {path}: {e}")
+        return False
@@ -0,0 +1,83 @@
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_PROFILE_DIR = "profiles"
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+class StackSampler(threading.Thread):
+    """Периодически снимает стек одного потока и считает одинаковые стеки.
+
+    Результат записывается в свернутом формате (collapsed stacks), который
+    читают flamegraph.pl, speedscope и другие средства построения flame graph.
+    """
+
+    def __init__(self, thread_id: int, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write_collapsed(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+@contextmanager
+def profile_run(output_dir=DEFAULT_PROFILE_DIR, interval: float = DEFAULT_SAMPLE_INTERVAL):
+    """Профилирует блок кода в текущем потоке.
+
+    Сохраняет в output_dir статистику cProfile (.pstats, открывается модулем
+    pstats или snakeviz) и стеки, снятые сэмплированием (.collapsed).
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    name = f"profile-{datetime.now():%Y%m%d-%H%M%S}"
+
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident(), interval)
+    started = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        sampler.stop()
+        stats_path = output_dir / f"{name}.pstats"
+        collapsed_path = output_dir / f"{name}.collapsed"
+        profiler.dump_stats(stats_path)
+        sampler.write_collapsed(collapsed_path)
+        logging.info(
+            f"Профиль за {time.perf_counter() - started:.2f} с сохранен: {stats_path}, {collapsed_path} "
+            f"(снимков стека: {sum(sampler.stacks.values())})"
+        )
@@ -0,0 +1,54 @@
+import threading
+
+
+class UpdateCancelled(Exception):
+    """Обновление остановлено по запросу пользователя"""
+
+
+class CancelToken:
+    """Флаг отмены, который выставляется из другого потока (например, из GUI)"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        if self.cancelled:
+            raise UpdateCancelled("Обновление отменено пользователем")
+
+
+class Progress:
+    """Ход обновления: передает его в callback и проверяет отмену.
+
+    callback(stage, table, done, total) вызывается в потоке обновления;
+    table - имя таблицы или None, total - None, если объем заранее
+    неизвестен (порции CSV). Отмена проверяется только в точках,
+    где прерывание безопасно: между таблицами и порциями строк.
+    """
+
+    def __init__(self, callback=None, cancel_token: CancelToken = None):
+        self.callback = callback
+        self.cancel_token = cancel_token
+
+    def report(self, stage: str, table: str = None, done: int = 0, total: int = None):
+        if self.callback is not None:
+            self.callback(stage, table, done, total)
+
+    def check(self):
+        if self.cancel_token is not None:
+            self.cancel_token.check()
+
+    def blocks(self, stage: str, chunks):
+        """Пропускает порции таблиц, сообщая число обработанных строк"""
+        rows = 0
+        for chunk in chunks:
+            self.check()
+            yield chunk
+            rows += len(chunk)
+            self.report(stage, None, rows, None)
@@ -1,12 +1,32 @@
 import sys
 import logging
-import json
 import os
-import unicodedata
-import re
+import argparse
+import sqlite3
+from contextlib import nullcontext
+from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 import pandas as pd
-import xlwings as xw
+from core.normalizer import (
+    DEFAULT_CACHE_SIZE, NORMALIZE_CACHE, SURNAME_CACHE, extract_surname, load_normalization_cache,
+    normalize_string, save_normalization_cache,
+)
+from core.aggregation import build_run_context, build_streaming_context, check_source_columns, map_managers, map_regions, sales_type
+from core.compiled_config import (
+    POINTS_TABLE_COLUMNS, REGION_TABLE_COLUMNS, CompiledConfig, column_letter_to_index, compile_config,
+    load_compiled_config, point_keys, table_columns,
+)
+from core.day_store import check_period, open_store
+from core.input_cache import clear_input_cache, file_fingerprint, fingerprint_index_path, load_source
+from core.input_reader import read_csv_chunks
+from core.metrics import DEFAULT_METRICS_DIR, RunMetrics, span
+from core.profiling import DEFAULT_PROFILE_DIR, profile_run
+from core.progress import Progress, UpdateCancelled
+from core.suggestions import log_suggestions, suggestion_index
+from core.workbook import BACKENDS, DEFAULT_BACKEND, SheetSnapshot, open_workbook, read_snapshot_file
+from core.write_plan import DEFAULT_WRITE_MODE, WRITE_MODES, TableWrite, WritePlan, apply_plan, skip_unchanged
 
 CONFIG_FILE = "config.json"
 DEFAULT_VALUE = 0
@@ -17,84 +37,69 @@ logging.basicConfig(
     stream=sys.stdout,
 )
 
-def normalize_string(s: str) -> str:
-    if not isinstance(s, str):
-        return ""
-
-    # Заменяем схожие символы (на кириллические заглавные, как в вашем примере)
-    # Можно использовать и строчные, главное - единообразие
-    char_map = {
-        # Цифры и похожие буквы
-        '3': 'З',
-        '0': 'О', # Заменяем на заглавную О
-        '6': 'б', # Пример для 6 и б
-        # Латинские и похожие кириллические
-        'a': 'а',
-        'A': 'А', # Не забудьте про заглавные латинские
-        'e': 'е',
-        'E': 'Е',
-        'o': 'о',
-        'O': 'О',
-        'p': 'р',
-        'P': 'Р',
-        'c': 'с',
-        'C': 'С',
-        'y': 'у',
-        'Y': 'У',
-        'x': 'х',
-        'X': 'Х',
-        'k': 'к',
-        'K': 'К',
-        't': 'т',
-        'T': 'Т',
-        'm': 'м',
-        'M': 'М',
-        'h': 'н',
-        'H': 'Н',
-        # Другие похожие буквы
-        'ё': 'е', # Это тоже полезно сделать до lower()
-    }
-
-    for char, replacement in char_map.items():
-        s = s.replace(char, replacement)
-
-    # Теперь приводим к нижнему регистру
-    s = s.lower()
-
-    # Удаляем знаки препинания (или другие ненужные символы)
-    s = re.sub(r'[^\w\s]', '', s)
+def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    df.columns = [NORMALIZE_CACHE(col) for col in df.columns]
+    return df
 
-    # Нормализуем пробелы
-    s = re.sub(r'\s+', ' ', s).strip()
+def header_day(cell_value):
+    """Номер дня из ячейки заголовка: число, строка с числом или дата Excel"""
+    if isinstance(cell_value, (datetime, date)):
+        return cell_value.day
+    if isinstance(cell_value, bool) or cell_value is None:
+        return None
+    try:
+        number = float(str(cell_value).strip()) if isinstance(cell_value, str) else float(cell_value)
+    except (TypeError, ValueError):
+        # Время, интервалы и другие значения, не приводимые к числу
+        return None
+    return int(number) if number.is_integer() else None
 
-    # NFC нормализация Unicode
-    s = unicodedata.normalize('NFC', s)
+@lru_cache(maxsize=64)
+def day_column_index(header: tuple, first_col: int) -> MappingProxyType:
+    """День -> номер столбца для строки заголовка таблицы.
 
-    return s
+    Результат кэшируется по содержимому заголовка, поэтому для одного и того
+    же макета листа индекс строится один раз.
+    """
+    index = {}
+    for offset, cell_value in enumerate(header):
+        day = header_day(cell_value)
+        if day is not None:
+            index.setdefault(day, first_col + offset)
+    return MappingProxyType(index)
 
-def normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    df.columns = [normalize_string(col) for col in df.columns]
-    return df
+def region_table_area(table_config: dict, config: dict = None) -> tuple:
+    cols = list(table_columns(config, table_config, REGION_TABLE_COLUMNS).values())
+    rows = [table_config[key] for key in ("day_row", "data_start_row", "data_end_row")]
+    return min(rows), min(cols), max(rows), max(cols)
 
-def extract_surname(full_name: str) -> str:
-    if not isinstance(full_name, str):
-        return ""
-    normalized = normalize_string(full_name)
-    parts = normalized.split()
-    if not parts:
-        return ""
-    surname = ''.join(c for c in parts[0] if c.isalpha())
-    return surname.capitalize()
+def points_table_area(table_config: dict, config: dict = None) -> tuple:
+    columns = table_columns(config, table_config, POINTS_TABLE_COLUMNS)
+    point_col, data_col = columns["point_col"], columns["data_col"]
+    cols = [point_col, data_col, data_col + 30]
+    return table_config["start_row"], min(cols), table_config["end_row"], max(cols)
 
-def column_letter_to_index(column_letter: str) -> int:
-    index = 0
-    for char in column_letter.upper():
-        if not char.isalpha():
-            raise ValueError(f"Недопустимый символ в обозначении столбца: {column_letter}")
-        index = index * 26 + (ord(char) - ord('A') + 1)
-    return index
+def configured_area(config: dict):
+    """Общая область листа, покрывающая все таблицы из конфигурации"""
+    tables = [(region_table_area, table) for table in config.get("region_tables", [])]
+    tables += [(points_table_area, table) for table in config.get("new_points_tables", [])]
+    areas = []
+    for table_area, table in tables:
+        try:
+            areas.append(table_area(table, config))
+        except (KeyError, ValueError):
+            # Ошибка в описании таблицы будет выведена при ее обновлении
+            continue
+    if not areas:
+        return None
+    return (
+        min(area[0] for area in areas),
+        min(area[1] for area in areas),
+        max(area[2] for area in areas),
+        max(area[3] for area in areas),
+    )
 
-def load_config() -> dict:
+def load_config() -> CompiledConfig:
     config_paths = [
         Path(CONFIG_FILE),
         Path(__file__).parent / CONFIG_FILE,
@@ -104,13 +109,8 @@ def load_config() -> dict:
     for config_path in config_paths:
         try:
             if config_path.exists():
-                with open(config_path, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
+                config = load_compiled_config(config_path)
                 logging.info(f"Конфигурация загружена из: {config_path}")
-                config["source_columns"] = {
-                    key: normalize_string(value) 
-                    for key, value in config["source_columns"].items()
-                }
                 return config
         except Exception as e:
             logging.warning(f"Ошибка при загрузке {config_path}: {e}")
@@ -122,198 +122,466 @@ def process_data(df: pd.DataFrame, config: dict) -> pd.DataFrame:
     df = normalize_columns(df)
     grouping_method = config.get("grouping_method", "region")
     source_cols = config["source_columns"]
-    
-    missing_columns = [col for col in source_cols.values() if col not in df.columns]
-    if missing_columns:
-        raise KeyError(f"Отсутствуют столбцы в исходных данных: {', '.join(missing_columns)}")
+    check_source_columns(df, config)
     
     if grouping_method == "manager":
-        df["temp_surname"] = df[source_cols["manager"]].apply(extract_surname)
-        normalized_mapping = {
-            normalize_string(k): v 
-            for k, v in config["manager_mapping"].items()
-        }
-        df["temp_sector"] = df["temp_surname"].apply(
-            lambda x: normalized_mapping.get(normalize_string(x), None)
-        )
-        unknown = df[df["temp_sector"].isna()]["temp_surname"].unique()
-        if len(unknown) > 0:
-            logging.warning(f"Не распознаны менеджеры: {', '.join(unknown)}")
-        
-        result = df.groupby("temp_sector").agg({
-            source_cols["bms_sales"]: "sum",
-            source_cols["fms_sales"]: "sum"
-        }).reset_index().rename(columns={"temp_sector": "Сектор"})
-        
-        return result
-    
+        keys = map_managers(df, config).rename("Сектор")
     elif grouping_method == "region":
-        df["temp_region"] = df[source_cols["region"]].map(config["region_mapping"])
-        unknown = df[df["temp_region"].isna()][source_cols["region"]].unique()
-        if len(unknown) > 0:
-            logging.warning(f"Не распознаны регионы: {', '.join(unknown)}")
-        
-        result = df.groupby("temp_region").agg({
-            source_cols["bms_sales"]: "sum",
-            source_cols["fms_sales"]: "sum"
-        }).reset_index().rename(columns={"temp_region": "Регион"})
-        
-        return result
-    
+        keys = map_regions(df, config).rename("Регион")
     else:
         raise ValueError(f"Неизвестный метод группировки: {grouping_method}")
+    
+    return df.groupby(keys).agg({
+        source_cols["bms_sales"]: "sum",
+        source_cols["fms_sales"]: "sum"
+    }).reset_index()
 
-def update_region_table(sheet, df, day, table_config, config):
+def plan_region_table(reader, context, day, table_config, config):
+    """Значения столбца дня для таблицы регионов/секторов или None при ошибке"""
     try:
-        region_col = column_letter_to_index(table_config["region_col"])
-        day_start = column_letter_to_index(table_config["day_start_col"])
-        day_end = column_letter_to_index(table_config["day_end_col"])
+        columns = table_columns(config, table_config, REGION_TABLE_COLUMNS)
+        region_col = columns["region_col"]
+        day_start = columns["day_start_col"]
+        day_end = columns["day_end_col"]
         
-        day_col = None
-        for col in range(day_start, day_end + 1):
-            cell_value = sheet.range((table_config["day_row"], col)).value
-            if cell_value is not None and int(cell_value) == day:
-                day_col = col
-                break
+        day_row = table_config["day_row"]
+        header = reader.read_block(day_row, day_start, day_row, day_end)[0]
+        day_col = day_column_index(tuple(header), day_start).get(day)
         
         if not day_col:
             raise ValueError(f"Столбец для дня {day} не найден в таблице {table_config['name']}")
         
-        sales_col = config["source_columns"]["bms_sales"] if table_config["type"] == "bms" else config["source_columns"]["fms_sales"]
-        group_column = "Сектор" if config["grouping_method"] == "manager" else "Регион"
-        df = df.set_index(group_column)
+        kind = sales_type(table_config)
         
-        for row in range(table_config["data_start_row"], table_config["data_end_row"] + 1):
-            region_cell = sheet.range((row, region_col))
-            region_name = str(region_cell.value).strip() if region_cell.value else None
+        first_row = table_config["data_start_row"]
+        labels = reader.read_block(first_row, region_col, table_config["data_end_row"], region_col)
+        values = []
+        missing = []
+        for (region_value,) in labels:
+            region_name = str(region_value).strip() if region_value else None
             
             if not region_name or region_name == "None":
+                values.append(None)
                 continue
-                
-            if region_name in df.index:
-                value = df.loc[region_name, sales_col]
+            
+            totals = context.group_totals.get(region_name)
+            if totals is not None:
+                value = totals[kind]
                 if pd.isna(value):
                     value = DEFAULT_VALUE
             else:
                 value = DEFAULT_VALUE
                 logging.warning(f"Не найден регион/сектор: {region_name}")
+                missing.append(region_name)
                 
-            sheet.range((row, day_col)).value = value
+            values.append(value)
         
-        logging.info(f"Таблица '{table_config['name']}' обновлена")
-        return df.reset_index()
+        if missing:
+            log_suggestions(missing, suggestion_index(config, "sectors"))
+        return TableWrite(table_config["name"], "region", first_row, day_col, values)
     except Exception as e:
         logging.error(f"Ошибка при обновлении таблицы '{table_config['name']}': {e}")
-        return df.reset_index() if 'df' in locals() else None
+        return None
 
-def update_points_table(sheet, source_df, day, table_config, config):
+def plan_points_table(reader, context, day, table_config, config):
+    """Значения столбца дня для таблицы пунктов или None при ошибке"""
     try:
-        point_col = column_letter_to_index(table_config["point_col"])
-        data_col = column_letter_to_index(table_config["data_col"])
+        columns = table_columns(config, table_config, POINTS_TABLE_COLUMNS)
+        point_col = columns["point_col"]
+        data_col = columns["data_col"]
         target_col = data_col + (day - 1)
-        sales_col = config["source_columns"]["bms_sales"] if table_config["type"] == "bms" else config["source_columns"]["fms_sales"]
-        
-        source_df = source_df.copy()
-        source_df["norm_point"] = source_df[config["source_columns"]["point"]].apply(normalize_string)
+        kind = sales_type(table_config)
         
-        # Получаем список пунктов из конфига
-        point_names = table_config.get("point_names", [])
-        normalized_point_names = [normalize_string(p) for p in point_names]
+        # Нормализованные пункты из конфига
+        normalized_point_names = point_keys(config, table_config)
         
-        for row in range(table_config["start_row"], table_config["end_row"] + 1):
-            point_cell = sheet.range((row, point_col))
-            point_name = str(point_cell.value).strip() if point_cell.value else None
+        first_row = table_config["start_row"]
+        labels = reader.read_block(first_row, point_col, table_config["end_row"], point_col)
+        values = []
+        missing_in_data = []
+        missing_in_list = []
+        for (point_value,) in labels:
+            point_name = str(point_value).strip() if point_value else None
             
             if not point_name or point_name == "None":
+                values.append(None)
                 continue
                 
-            normalized_point = normalize_string(point_name)
+            normalized_point = NORMALIZE_CACHE(point_name)
             value = DEFAULT_VALUE
             
             # Проверяем, есть ли пункт в списке из конфига
             if normalized_point in normalized_point_names:
-                # Ищем в исходных данных
-                matches = source_df[source_df["norm_point"] == normalized_point]
-                if not matches.empty:
-                    value = matches[sales_col].iloc[0]
+                # Ищем в исходных данных, с учетом варианта с "пп" перед названием
+                totals = context.points.lookup(normalized_point)
+                if totals is not None:
+                    value = totals[kind]
                 else:
-                    # Проверяем вариант с "пп" перед названием
-                    matches = source_df[source_df["norm_point"] == f"пп {normalized_point}"]
-                    if not matches.empty:
-                        value = matches[sales_col].iloc[0]
-                    else:
-                        logging.warning(f"Не найден пункт в данных: {point_name}")
+                    logging.warning(f"Не найден пункт в данных: {point_name}")
+                    missing_in_data.append(point_name)
             else:
                 logging.warning(f"Пункт не найден в списке: {point_name}")
+                missing_in_list.append(point_name)
             
             if pd.isna(value):
                 value = DEFAULT_VALUE
                 
-            sheet.range((row, target_col)).value = value
+            values.append(value)
         
-        logging.info(f"Таблица пунктов '{table_config['name']}' обновлена")
+        if missing_in_list:
+            log_suggestions(missing_in_list, suggestion_index(config, "points"))
+        if missing_in_data:
+            # Для пунктов, которых нет в выгрузке, ищем похожие среди пунктов выгрузки
+            log_suggestions(missing_in_data, context.points.suggestions())
+        return TableWrite(table_config["name"], "points", first_row, target_col, values)
     except Exception as e:
         logging.error(f"Ошибка при обновлении таблицы пунктов '{table_config['name']}': {e}")
+        return None
+
+def table_rows(table_config: dict) -> int:
+    """Число строк таблицы из конфигурации (0, если границы не заданы)"""
+    first_row = table_config.get("data_start_row", table_config.get("start_row"))
+    last_row = table_config.get("data_end_row", table_config.get("end_row"))
+    try:
+        return max(int(last_row) - int(first_row) + 1, 0)
+    except (TypeError, ValueError):
+        return 0
+
+def build_write_plan(reader, context, day, sheet_name, config, metrics=None, progress: Progress = None) -> WritePlan:
+    """План записи для всех таблиц из конфигурации.
+    
+    reader - лист или его снимок; в книгу план ничего не пишет.
+    """
+    plan = WritePlan(sheet_name, day)
+    tables = [(plan_region_table, table) for table in config.get("region_tables", [])]
+    tables += [(plan_points_table, table) for table in config.get("new_points_tables", [])]
+    total = sum(table_rows(table) for _, table in tables)
+    done = 0
+    for plan_table, table in tables:
+        if progress is not None:
+            progress.check()
+        with span(metrics, f"plan: {table['name']}"):
+            table_write = plan_table(reader, context, day, table, config)
+        if table_write is not None:
+            plan.add(table_write)
+        done += table_rows(table)
+        if progress is not None:
+            progress.report("plan", table["name"], done, total)
+    return plan
+
+def update_region_table(sheet, context, day, table_config, config, snapshot=None):
+    reader = snapshot if snapshot is not None else sheet
+    table_write = plan_region_table(reader, context, day, table_config, config)
+    if table_write is not None:
+        plan = WritePlan(None, day)
+        plan.add(table_write)
+        apply_plan(sheet, plan)
 
-def update_report_sheet(report_path: str, sheet_name: str, input_file: str, day: int) -> bool:
+def update_points_table(sheet, context, day, table_config, config, snapshot=None):
+    reader = snapshot if snapshot is not None else sheet
+    table_write = plan_points_table(reader, context, day, table_config, config)
+    if table_write is not None:
+        plan = WritePlan(None, day)
+        plan.add(table_write)
+        apply_plan(sheet, plan)
+
+def setup_normalization_cache(config: dict):
+    cache_size = config.get("normalize_cache_size", DEFAULT_CACHE_SIZE)
+    NORMALIZE_CACHE.resize(cache_size)
+    SURNAME_CACHE.resize(cache_size)
+    cache_file = config.get("normalize_cache_file")
+    if cache_file:
+        load_normalization_cache(cache_file)
+
+def finish_normalization_cache(config: dict, save: bool = True):
+    stats = NORMALIZE_CACHE.stats()
+    logging.info(
+        f"Кэш нормализации: попаданий {stats['hits']}, промахов {stats['misses']}, "
+        f"значений {stats['size']} из {stats['maxsize']}"
+    )
+    cache_file = config.get("normalize_cache_file")
+    if cache_file and save:
+        save_normalization_cache(cache_file)
+
+def build_context(input_file: str, config: dict, metrics=None, progress: Progress = None,
+                  read_only: bool = False):
+    """Агрегаты выгрузки: CSV обрабатывается потоково, Excel - целиком"""
+    progress = progress or Progress()
+    if Path(input_file).suffix.lower() == ".csv":
+        # Чтение и агрегирование идут порциями вперемешку и не разделяются на этапы
+        with span(metrics, "read_input"):
+            chunks = progress.blocks("read_input", read_csv_chunks(input_file, config))
+            return build_streaming_context(chunks, config)
+    with span(metrics, "read_input"):
+        source_df = load_source(input_file, config, write_cache=not read_only)
+    progress.report("read_input", None, len(source_df), len(source_df))
+    progress.check()
+    with span(metrics, "process_data"):
+        return build_run_context(source_df, config)
+
+def open_store_or_warn(config: dict, read_only: bool = False):
+    """Хранилище агрегатов или None, если оно отключено или недоступно"""
+    try:
+        return open_store(config, read_only)
+    except (OSError, sqlite3.Error) as e:
+        logging.warning(f"Хранилище агрегатов недоступно, агрегаты считаются по выгрузке: {e}")
+        return None
+
+def obtain_context(input_file: str, config: dict, day: int, period: str, from_store: bool = False,
+                   metrics=None, progress: Progress = None, read_only: bool = False):
+    """Агрегаты дня: из хранилища, если они уже посчитаны по этому файлу, иначе из выгрузки.
+    
+    Без периода хранилище не используется: месяц отчета нельзя угадать
+    по текущей дате, иначе повторный расчет дня прошлого месяца
+    перезапишет день текущего. Хранилище - только кэш, поэтому ошибки
+    при работе с ним не прерывают расчет. С read_only хранилище и кэши
+    только читаются.
+    """
+    progress = progress or Progress()
+    progress.report("read_input")
+    if period is None:
+        if from_store:
+            raise ValueError("Для агрегатов из хранилища нужно указать период отчета")
+        if config.get("aggregate_store", True):
+            logging.info("Период отчета не указан, хранилище агрегатов не используется")
+        return build_context(input_file, config, metrics, progress, read_only)
+    period = check_period(period)
+    if from_store:
+        store = open_store(config, read_only)
+        if store is None:
+            raise ValueError("Хранилище агрегатов отключено в конфигурации")
+        context = store.load_day(period, day, config)
+        if context is None:
+            raise ValueError(f"В хранилище нет данных за {period}, день {day}")
+        logging.info(f"Агрегаты за {period}, день {day} взяты из хранилища")
+        return context
+    
+    store = open_store_or_warn(config, read_only)
+    if store is None:
+        return build_context(input_file, config, metrics, progress, read_only)
+    
+    with span(metrics, "store"):
+        fingerprint = file_fingerprint(input_file, fingerprint_index_path(config), update_index=not read_only)
+        try:
+            context = store.load_day(period, day, config, fingerprint)
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Не удалось прочитать хранилище агрегатов: {e}")
+            context = None
+    if context is not None:
+        logging.info(f"Агрегаты за {period}, день {day} взяты из хранилища (файл не изменился)")
+        return context
+    context = build_context(input_file, config, metrics, progress, read_only)
+    progress.check()
+    if read_only:
+        return context
+    with span(metrics, "store"):
+        try:
+            store.save_day(period, day, fingerprint, context, config, str(input_file))
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Не удалось сохранить агрегаты в хранилище: {e}")
+    return context
+
+def update_report_sheet(report_path: str, sheet_name: str, input_file: str, day: int,
+                        backend: str = None, period: str = None, from_store: bool = False,
+                        excel_pool=None, write_mode: str = None, metrics: RunMetrics = None,
+                        config: dict = None, on_progress=None, cancel_token=None) -> bool:
+    """Обновляет лист отчета. config - уже загруженная конфигурация (например, из GUI);
+    без нее конфигурация читается из config.json.
+    
+    on_progress(stage, table, done, total) получает ход обновления (core.progress).
+    Если cancel_token отменен, между таблицами и порциями строк выбрасывается
+    UpdateCancelled, а книга закрывается без сохранения.
+    """
+    metrics = metrics if metrics is not None else RunMetrics()
+    progress = Progress(on_progress, cancel_token)
+    workbook = None
     app = None
+    success = False
+    cancelled = False
     try:
-        config = load_config()
-        source_df = pd.read_excel(input_file)
-        source_df = normalize_columns(source_df)
-        processed_df = process_data(source_df, config)
+        with metrics.span("load_config"):
+            config = compile_config(config) if config is not None else load_config()
+        backend = backend or config.get("excel_backend", DEFAULT_BACKEND)
+        write_mode = write_mode or config.get("write_mode", DEFAULT_WRITE_MODE)
+        if write_mode not in WRITE_MODES:
+            raise ValueError(f"Неизвестный режим записи: {write_mode}")
+        setup_normalization_cache(config)
+        context = obtain_context(input_file, config, day, period, from_store, metrics, progress)
         
-        app = xw.App(visible=False)
-        wb = app.books.open(report_path)
-        sheet = wb.sheets[sheet_name]
+        progress.check()
+        if excel_pool is not None and backend == "xlwings":
+            with metrics.span("excel_start"):
+                app = excel_pool.acquire()
+        workbook = open_workbook(report_path, backend, app, metrics)
+        sheet = workbook.sheet(sheet_name)
         
-        if "region_tables" in config:
-            for table in config["region_tables"]:
-                processed_df = update_region_table(sheet, processed_df.copy(), day, table, config)
+        # Все таблицы читают подписи и заголовки из одного снимка листа
+        area = configured_area(config)
+        with metrics.span("snapshot"):
+            snapshot = SheetSnapshot.read(sheet, *area) if area else sheet
         
-        if "new_points_tables" in config:
-            for table in config["new_points_tables"]:
-                update_points_table(sheet, source_df, day, table, config)
+        plan = build_write_plan(snapshot, context, day, sheet_name, config, metrics, progress)
+        if write_mode == "changed":
+            # Снимок покрывает и записываемые столбцы, повторно лист не читается
+            plan = skip_unchanged(plan, snapshot)
+        apply_plan(sheet, plan, metrics, progress)
         
-        wb.save()
+        finish_normalization_cache(config)
+        # Последняя возможность отмены: после сохранения отчет уже изменен
+        progress.check()
+        progress.report("save", None, 0, 1)
+        with metrics.span("save"):
+            workbook.save()
+        progress.report("save", None, 1, 1)
         logging.info("Отчет успешно обновлен")
+        success = True
         return True
+    except UpdateCancelled:
+        logging.warning("Обновление отменено, отчет не сохранен")
+        cancelled = True
+        raise
     except Exception as e:
         logging.error(f"Критическая ошибка: {e}", exc_info=True)
         return False
     finally:
-        if app:
-            app.quit()
+        try:
+            if workbook:
+                with metrics.span("close"):
+                    workbook.close()
+        finally:
+            if app is not None:
+                excel_pool.release(app)
+            metrics.finish()
+            metrics.info.update(report=str(report_path), sheet=sheet_name, day=day,
+                                backend=backend, success=success, cancelled=cancelled)
+            save_run_metrics(metrics, config)
 
-def update_reports(input_file: str, report_file: str, sheet_name: str, day: int) -> bool:
+def save_run_metrics(metrics: RunMetrics, config: dict = None):
+    metrics_dir = (config or {}).get("metrics_dir", DEFAULT_METRICS_DIR)
+    if not metrics_dir:
+        return
+    try:
+        metrics.save(metrics_dir)
+    except Exception as e:
+        logging.warning(f"Не удалось сохранить метрики запуска: {e}")
+
+def plan_report_sheet(report_path: str, sheet_name: str, input_file: str, day: int,
+                      period: str = None, from_store: bool = False) -> WritePlan:
+    """План записи без изменения отчета: лист читается openpyxl, Excel не запускается.
+
+    Хранилище агрегатов и кэши только читаются, ничего не записывается.
+    """
+    config = load_config()
+    setup_normalization_cache(config)
+    context = obtain_context(input_file, config, day, period, from_store, read_only=True)
+    
+    area = configured_area(config)
+    if area is None:
+        return WritePlan(sheet_name, day)
+    snapshot = read_snapshot_file(report_path, sheet_name, *area)
+    plan = build_write_plan(snapshot, context, day, sheet_name, config)
+    finish_normalization_cache(config, save=False)
+    return plan
+
+def write_dry_run(plan: WritePlan, output: str):
+    if output == "-":
+        plan.dump(sys.stdout)
+        return
+    with open(output, 'w', encoding='utf-8') as f:
+        plan.dump(f)
+    logging.info(f"План записи сохранен в: {output}")
+
+def update_reports(input_file: str, report_file: str, sheet_name: str, day: int, **options) -> bool:
+    """options передаются в update_report_sheet; при отмене выбрасывается UpdateCancelled"""
     logging.info(f"Начало обновления отчета (день: {day})")
-    result = update_report_sheet(report_file, sheet_name, input_file, day)
+    result = update_report_sheet(report_file, sheet_name, input_file, day, **options)
     if result:
         logging.info("Обновление завершено успешно")
     else:
         logging.error("Обновление завершено с ошибками")
     return result
 
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Обновление отчета по данным выгрузки",
+        usage="%(prog)s [-h] [параметры] input_file report_file sheet_name day\n"
+              "       %(prog)s [-h] [параметры] --from-store --period ГГГГ-ММ report_file sheet_name day",
+    )
+    parser.add_argument("input_file", nargs="?", help="входной файл (при --from-store не указывается)")
+    parser.add_argument("report_file", nargs="?", help="файл отчета")
+    parser.add_argument("sheet_name", nargs="?", help="имя листа")
+    parser.add_argument("day", nargs="?", help="день (1-31)")
+    parser.add_argument("--backend", choices=BACKENDS,
+                        help="движок работы с Excel (по умолчанию из конфигурации)")
+    parser.add_argument("--period",
+                        help="месяц отчета в формате ГГГГ-ММ; без него хранилище агрегатов не используется")
+    parser.add_argument("--from-store", action="store_true",
+                        help="взять агрегаты дня из хранилища, не читая входной файл")
+    parser.add_argument("--skip-unchanged", action="store_true",
+                        help="записывать только ячейки, значения которых изменились")
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_PROFILE_DIR, metavar="DIR",
+                        help=f"профилировать обновление и сохранить результат в DIR (по умолчанию {DEFAULT_PROFILE_DIR})")
+    parser.add_argument("--memory", action="store_true",
+                        help="замерять пик памяти по этапам (tracemalloc замедляет работу)")
+    parser.add_argument("--dry-run", nargs="?", const="-", metavar="FILE",
+                        help="не изменять отчет, а вывести план записи в JSON (в файл или на экран)")
+    parser.add_argument("--clear-cache", action="store_true",
+                        help="очистить кэш разобранных входных файлов")
+    args = parser.parse_args(argv)
+    if args.from_store and args.day is None and args.sheet_name is not None:
+        # Входной файл при --from-store не нужен, позиционные аргументы сдвигаются
+        args.input_file, args.report_file, args.sheet_name, args.day = (
+            None, args.input_file, args.report_file, args.sheet_name)
+    if not args.clear_cache and args.day is None:
+        parser.error("необходимо указать входной файл, файл отчета, имя листа и день")
+    if args.from_store and not args.period:
+        parser.error("для --from-store необходимо указать --period")
+    if args.period:
+        try:
+            args.period = check_period(args.period)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
 def main():
-    if len(sys.argv) != 5:
-        print("Использование: python report_updater.py <входной_файл> <файл_отчета> <имя_листа> <день>")
-        sys.exit(1)
+    args = parse_args()
     
-    input_file = sys.argv[1]
-    report_file = sys.argv[2]
-    sheet_name = sys.argv[3]
+    if args.clear_cache:
+        clear_input_cache(load_config())
+        if args.day is None:
+            return
     
     try:
-        day = int(sys.argv[4])
+        day = int(args.day)
         if day < 1 or day > 31:
             raise ValueError("День должен быть числом от 1 до 31")
     except ValueError as e:
         logging.error(f"Ошибка в параметре дня: {e}")
         sys.exit(1)
     
+    if args.dry_run:
+        if args.dry_run == "-":
+            # stdout занят планом, журнал выводим в stderr
+            for handler in logging.getLogger().handlers:
+                if isinstance(handler, logging.StreamHandler):
+                    handler.setStream(sys.stderr)
+        try:
+            plan = plan_report_sheet(args.report_file, args.sheet_name, args.input_file, day,
+                                     period=args.period, from_store=args.from_store)
+            write_dry_run(plan, args.dry_run)
+        except Exception as e:
+            logging.error(f"Ошибка: {e}", exc_info=True)
+            sys.exit(1)
+        return
+    
     try:
         logging.info(f"Начало обновления отчета (день: {day})")
-        success = update_report_sheet(report_file, sheet_name, input_file, day)
+        with profile_run(args.profile) if args.profile else nullcontext():
+            success = update_report_sheet(args.report_file, args.sheet_name, args.input_file, day,
+                                          backend=args.backend, period=args.period,
+                                          from_store=args.from_store,
+                                          write_mode="changed" if args.skip_unchanged else None,
+                                          metrics=RunMetrics(track_memory=args.memory))
         if success:
             logging.info("Обновление завершено успешно")
         else:
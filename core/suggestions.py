@@ -0,0 +1,113 @@
+import logging
+from collections import Counter, defaultdict
+from core.compiled_config import CompiledConfig
+from core.normalizer import NORMALIZE_CACHE
+
+NGRAM_SIZE = 3
+# Сколько кандидатов с наибольшим числом общих n-грамм проверяется расстоянием Левенштейна
+CANDIDATES = 20
+DEFAULT_LIMIT = 3
+MIN_SIMILARITY = 0.5
+
+
+def ngrams(value: str, size: int = NGRAM_SIZE) -> set:
+    padded = f" {value} "
+    return {padded[i:i + size] for i in range(max(len(padded) - size + 1, 1))}
+
+
+def edit_distance(a: str, b: str) -> int:
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b),
+            ))
+        previous = current
+    return previous[-1]
+
+
+class SuggestionIndex:
+    """Поиск похожих названий для значений, которых нет в справочнике.
+
+    Кандидаты отбираются по общим n-граммам через обратный индекс,
+    затем ранжируются по расстоянию Левенштейна между нормализованными
+    строками. Индекс строится один раз и отвечает за миллисекунды даже
+    на тысячах названий.
+    """
+
+    def __init__(self, names):
+        self.names = {}
+        for name in names:
+            self.names.setdefault(NORMALIZE_CACHE(name), name)
+        self.keys = list(self.names)
+        self._grams = [ngrams(key) for key in self.keys]
+        self._postings = defaultdict(list)
+        for number, grams in enumerate(self._grams):
+            for gram in grams:
+                self._postings[gram].append(number)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def suggest(self, value, limit: int = DEFAULT_LIMIT, min_similarity: float = MIN_SIMILARITY) -> list:
+        """[(название из справочника, сходство от 0 до 1)] по убыванию сходства"""
+        query = NORMALIZE_CACHE(str(value))
+        # Название из справочника - не опечатка, подсказывать нечего
+        if not query or query in self.names:
+            return []
+        query_grams = ngrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._postings.get(gram, ()))
+        # Коэффициент Дайса по n-граммам для предварительного отбора
+        candidates = sorted(
+            shared,
+            key=lambda number: 2 * shared[number] / (len(query_grams) + len(self._grams[number])),
+            reverse=True,
+        )[:CANDIDATES]
+        scored = []
+        for number in candidates:
+            key = self.keys[number]
+            similarity = 1 - edit_distance(query, key) / max(len(query), len(key))
+            if similarity >= min_similarity:
+                scored.append((self.names[key], similarity))
+        scored.sort(key=lambda item: item[1], reverse=True)
+        return scored[:limit]
+
+
+def _index_names(config: dict, kind: str) -> list:
+    if kind == "managers":
+        return list(config.get("manager_mapping", {}))
+    if kind == "regions":
+        return list(config.get("region_mapping", {}))
+    if kind == "sectors":
+        return sorted(set(config.get("manager_mapping", {}).values()) | set(config.get("region_mapping", {}).values()))
+    if kind == "points":
+        return [name for table in config.get("new_points_tables", []) for name in table.get("point_names", [])]
+    raise ValueError(f"Неизвестный справочник для подсказок: {kind}")
+
+
+def suggestion_index(config: dict, kind: str) -> SuggestionIndex:
+    """Индекс по справочнику конфигурации: managers, regions, sectors или points.
+
+    Для скомпилированной конфигурации индекс строится один раз на ее версию.
+    """
+    if isinstance(config, CompiledConfig):
+        index = config.suggestion_indexes.get(kind)
+        if index is None:
+            index = config.suggestion_indexes[kind] = SuggestionIndex(_index_names(config, kind))
+        return index
+    return SuggestionIndex(_index_names(config, kind))
+
+
+def log_suggestions(values, index: SuggestionIndex, limit: int = DEFAULT_LIMIT):
+    for value in values:
+        suggestions = index.suggest(value, limit)
+        if suggestions:
+            variants = ", ".join(f"{name} ({similarity:.0%})" for name, similarity in suggestions)
+            logging.info(f"Возможно, вместо '{value}' имелось в виду: {variants}")
@@ -0,0 +1,204 @@
+import logging
+from pathlib import Path
+import numpy as np
+from core.metrics import span
+
+BACKENDS = ("xlwings", "openpyxl")
+DEFAULT_BACKEND = "xlwings"
+
+
+class XlwingsSheet:
+    """Лист книги, открытой через запущенный Excel (xlwings)"""
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+
+    def read_block(self, first_row: int, first_col: int, last_row: int, last_col: int) -> list:
+        return self.sheet.range((first_row, first_col), (last_row, last_col)).options(ndim=2).value
+
+    def write_column(self, first_row: int, col: int, values: list):
+        self.sheet.range((first_row, col)).value = [[_from_numpy(value)] for value in values]
+
+
+class XlwingsWorkbook:
+    """Книга в Excel. Если передан уже запущенный app, при закрытии
+    закрывается только книга, а сам Excel остается работать."""
+
+    def __init__(self, path: str, app=None, metrics=None):
+        self.owns_app = app is None
+        if self.owns_app:
+            import xlwings as xw
+
+            with span(metrics, "excel_start"):
+                app = xw.App(visible=False)
+        self.app = app
+        try:
+            with span(metrics, "books_open"):
+                self.book = self.app.books.open(path)
+        except Exception:
+            if self.owns_app:
+                self.app.quit()
+            raise
+
+    def sheet(self, name: str) -> XlwingsSheet:
+        return XlwingsSheet(self.book.sheets[name])
+
+    def save(self):
+        self.book.save()
+
+    def close(self):
+        if self.owns_app:
+            self.app.quit()
+        else:
+            self.book.close()
+
+
+class OpenpyxlSheet:
+    """Лист книги, открытой openpyxl без запуска Excel.
+
+    Значения читаются из копии книги с вычисленными значениями формул
+    (data_only), а записываются в книгу с формулами, которая и сохраняется.
+    """
+
+    def __init__(self, sheet, values_sheet):
+        self.sheet = sheet
+        self.values_sheet = values_sheet
+
+    def set_value(self, row: int, col: int, value):
+        value = _from_numpy(value)
+        self.sheet.cell(row=row, column=col).value = value
+        self.values_sheet.cell(row=row, column=col).value = value
+
+    def read_block(self, first_row: int, first_col: int, last_row: int, last_col: int) -> list:
+        return [
+            [_to_excel_value(cell.value) for cell in row]
+            for row in self.values_sheet.iter_rows(min_row=first_row, max_row=last_row,
+                                                   min_col=first_col, max_col=last_col)
+        ]
+
+    def write_column(self, first_row: int, col: int, values: list):
+        for offset, value in enumerate(values):
+            self.set_value(first_row + offset, col, value)
+
+
+class OpenpyxlWorkbook:
+    def __init__(self, path: str):
+        import openpyxl
+
+        self.path = path
+        suffix = Path(path).suffix.lower()
+        if suffix not in (".xlsx", ".xlsm"):
+            raise ValueError(f"Движок openpyxl не поддерживает файлы формата {suffix}")
+        keep_vba = suffix == ".xlsm"
+        self.book = openpyxl.load_workbook(path, keep_vba=keep_vba)
+        self.values_book = openpyxl.load_workbook(path, data_only=True, keep_vba=keep_vba)
+
+    def sheet(self, name: str) -> OpenpyxlSheet:
+        return OpenpyxlSheet(self.book[name], self.values_book[name])
+
+    def save(self):
+        # openpyxl не пересчитывает формулы, поэтому просим Excel сделать это при открытии
+        self.book.calculation.fullCalcOnLoad = True
+        self.book.save(self.path)
+
+    def close(self):
+        self.book.close()
+        self.values_book.close()
+
+
+class SheetSnapshot:
+    """Значения прямоугольной области листа, прочитанные одним обращением.
+
+    Поддерживает тот же метод read_block, что и листы, поэтому может
+    использоваться вместо листа для всех чтений внутри области.
+    """
+
+    def __init__(self, values, first_row: int, first_col: int):
+        self.values = np.array(values, dtype=object).reshape(len(values), -1)
+        self.first_row = first_row
+        self.first_col = first_col
+
+    @classmethod
+    def read(cls, sheet, first_row: int, first_col: int, last_row: int, last_col: int) -> "SheetSnapshot":
+        return cls(sheet.read_block(first_row, first_col, last_row, last_col), first_row, first_col)
+
+    @property
+    def last_row(self) -> int:
+        return self.first_row + self.values.shape[0] - 1
+
+    @property
+    def last_col(self) -> int:
+        return self.first_col + self.values.shape[1] - 1
+
+    def read_block(self, first_row: int, first_col: int, last_row: int, last_col: int) -> list:
+        if (first_row < self.first_row or first_col < self.first_col
+                or last_row > self.last_row or last_col > self.last_col):
+            raise ValueError(
+                f"Область ({first_row}, {first_col})-({last_row}, {last_col}) вне снимка листа"
+            )
+        return self.values[
+            first_row - self.first_row:last_row - self.first_row + 1,
+            first_col - self.first_col:last_col - self.first_col + 1,
+        ].tolist()
+
+
+def read_snapshot_file(path: str, sheet_name: str, first_row: int, first_col: int,
+                       last_row: int, last_col: int) -> SheetSnapshot:
+    """Снимок области листа, прочитанный openpyxl в режиме только чтения, без Excel"""
+    import openpyxl
+
+    suffix = Path(path).suffix.lower()
+    if suffix not in (".xlsx", ".xlsm"):
+        raise ValueError(f"Чтение без Excel не поддерживает файлы формата {suffix}")
+    book = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = book[sheet_name].iter_rows(min_row=first_row, max_row=last_row,
+                                          min_col=first_col, max_col=last_col, values_only=True)
+        values = [[_to_excel_value(value) for value in row] for row in rows]
+    finally:
+        book.close()
+    # Строки и столбцы за пределами заполненной части листа openpyxl не возвращает
+    width = last_col - first_col + 1
+    values = [row + [None] * (width - len(row)) for row in values]
+    values += [[None] * width for _ in range(last_row - first_row + 1 - len(values))]
+    return SheetSnapshot(values, first_row, first_col)
+
+
+def _to_excel_value(value):
+    # xlwings возвращает все числа как float, приводим openpyxl к тому же виду
+    if isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def _from_numpy(value):
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def write_column_segments(sheet, first_row: int, col: int, values: list):
+    """Записывает столбец значений, пропуская ячейки со значением None.
+
+    Каждый непрерывный участок записывается одним обращением к листу.
+    """
+    start = None
+    for offset, value in enumerate(values + [None]):
+        if value is not None and start is None:
+            start = offset
+        elif value is None and start is not None:
+            sheet.write_column(first_row + start, col, values[start:offset])
+            start = None
+
+
+def open_workbook(path: str, backend: str = DEFAULT_BACKEND, app=None, metrics=None):
+    """Открывает книгу выбранным движком. app - уже запущенный Excel для xlwings"""
+    if backend == "xlwings":
+        workbook = XlwingsWorkbook(path, app, metrics)
+    elif backend == "openpyxl":
+        with span(metrics, "books_open"):
+            workbook = OpenpyxlWorkbook(path)
+    else:
+        raise ValueError(f"Неизвестный движок Excel: {backend}")
+    logging.info(f"Книга открыта через {backend}: {path}")
+    return workbook
@@ -0,0 +1,140 @@
+import json
+import logging
+import math
+from core.metrics import span
+from core.workbook import _from_numpy, write_column_segments
+
+WRITE_MODES = ("all", "changed")
+DEFAULT_WRITE_MODE = "all"
+# Сколько измененных ячеек перечислять в журнале для каждой таблицы
+CHANGES_IN_LOG = 5
+# Excel хранит около 15 значащих цифр, поэтому числа сравниваются с допуском
+VALUE_REL_TOL = 1e-12
+
+TABLE_TITLES = {
+    "region": "Таблица",
+    "points": "Таблица пунктов",
+}
+
+
+class TableWrite:
+    """Значения одного столбца таблицы, начиная с first_row.
+
+    None означает, что ячейка не записывается (пустая подпись строки).
+    """
+
+    def __init__(self, name: str, table_type: str, first_row: int, col: int, values: list):
+        self.name = name
+        self.table_type = table_type
+        self.first_row = first_row
+        self.col = col
+        self.values = values
+
+    def cells(self):
+        for offset, value in enumerate(self.values):
+            if value is not None:
+                yield self.first_row + offset, self.col, _from_numpy(value)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "type": self.table_type,
+            "cells": [list(cell) for cell in self.cells()],
+        }
+
+
+class WritePlan:
+    """Все записи в лист отчета за один запуск, посчитанные до открытия книги"""
+
+    def __init__(self, sheet_name: str, day: int):
+        self.sheet_name = sheet_name
+        self.day = day
+        self.tables = []
+
+    def add(self, table: TableWrite):
+        self.tables.append(table)
+
+    def cells(self):
+        for table in self.tables:
+            for row, col, value in table.cells():
+                yield self.sheet_name, row, col, value
+
+    def to_dict(self) -> dict:
+        return {
+            "sheet": self.sheet_name,
+            "day": self.day,
+            "tables": [table.to_dict() for table in self.tables],
+        }
+
+    def dump(self, stream):
+        json.dump(self.to_dict(), stream, ensure_ascii=False, indent=1)
+        stream.write("\n")
+
+
+def _cell_name(row: int, col: int) -> str:
+    letters = ""
+    while col:
+        col, rest = divmod(col - 1, 26)
+        letters = chr(ord('A') + rest) + letters
+    return f"{letters}{row}"
+
+
+def _same_value(current, value) -> bool:
+    value = _from_numpy(value)
+    if isinstance(current, bool) or isinstance(value, bool):
+        return current is value
+    if isinstance(current, (int, float)) and isinstance(value, (int, float)):
+        return math.isclose(float(current), float(value), rel_tol=VALUE_REL_TOL)
+    return current == value
+
+
+def skip_unchanged(plan: WritePlan, reader) -> WritePlan:
+    """План, в котором оставлены только ячейки, отличающиеся от текущих значений листа.
+
+    reader - лист или снимок, покрывающий записываемые столбцы. В журнал
+    выводится число измененных ячеек по каждой таблице.
+    """
+    result = WritePlan(plan.sheet_name, plan.day)
+    for table in plan.tables:
+        last_row = table.first_row + len(table.values) - 1
+        current = reader.read_block(table.first_row, table.col, last_row, table.col)
+        values = []
+        changes = []
+        for offset, (value, (current_value,)) in enumerate(zip(table.values, current)):
+            if value is None or _same_value(current_value, value):
+                values.append(None)
+                continue
+            values.append(value)
+            changes.append(f"{_cell_name(table.first_row + offset, table.col)}: "
+                           f"{current_value} -> {_from_numpy(value)}")
+        total = sum(value is not None for value in table.values)
+        message = f"{TABLE_TITLES[table.table_type]} '{table.name}': изменено ячеек {len(changes)} из {total}"
+        if changes:
+            shown = "; ".join(changes[:CHANGES_IN_LOG])
+            more = f" и еще {len(changes) - CHANGES_IN_LOG}" if len(changes) > CHANGES_IN_LOG else ""
+            message += f" ({shown}{more})"
+        logging.info(message)
+        result.add(TableWrite(table.name, table.table_type, table.first_row, table.col, values))
+    return result
+
+
+def apply_plan(sheet, plan: WritePlan, metrics=None, progress=None):
+    """Выполняет план: каждый непрерывный участок столбца записывается одним обращением.
+
+    progress (core.progress.Progress) получает число записанных строк и
+    проверяет отмену перед каждой таблицей.
+    """
+    total = sum(len(table.values) for table in plan.tables)
+    done = 0
+    for table in plan.tables:
+        if progress is not None:
+            progress.check()
+        try:
+            with span(metrics, f"write: {table.name}"):
+                write_column_segments(sheet, table.first_row, table.col, table.values)
+            logging.info(f"{TABLE_TITLES[table.table_type]} '{table.name}' обновлена")
+        except Exception as e:
+            logging.error(f"Ошибка при записи таблицы '{table.name}': {e}")
+        done += len(table.values)
+        if progress is not None:
+            progress.report("write", table.name, done, total)
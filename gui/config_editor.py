@@ -3,9 +3,10 @@ from tkinter import ttk, messagebox, simpledialog
 from core.config_manager import save_config
 
 class ConfigEditor:
-    def __init__(self, parent, config):
+    def __init__(self, parent, config, on_change=None):
         self.parent = parent
         self.config = config
+        self.on_change = on_change  # Callback после изменения конфигурации
         self.points_lists = {}
         self.create_widgets()
         self.load_data()
@@ -52,6 +53,14 @@ class ConfigEditor:
         self.grouping_method = ttk.Combobox(frame, values=["manager", "region"], width=10)
         self.grouping_method.grid(row=5, column=1, sticky='w', padx=5, pady=5)
 
+        ttk.Label(frame, text="Движок Excel:").grid(row=6, column=0, sticky='w', padx=10, pady=5)
+        self.excel_backend = ttk.Combobox(frame, values=["xlwings", "openpyxl"], width=10)
+        self.excel_backend.grid(row=6, column=1, sticky='w', padx=5, pady=5)
+
+        ttk.Label(frame, text="Запись ячеек:").grid(row=7, column=0, sticky='w', padx=10, pady=5)
+        self.write_mode = ttk.Combobox(frame, values=["all", "changed"], width=10)
+        self.write_mode.grid(row=7, column=1, sticky='w', padx=5, pady=5)
+
         frame.grid_columnconfigure(1, weight=1)
         frame.pack_propagate(False)
 
@@ -107,6 +116,8 @@ class ConfigEditor:
         self.entries["bms_col"].insert(0, source_cols["bms_sales"])
         self.entries["fms_col"].insert(0, source_cols["fms_sales"])
         self.grouping_method.set(self.config["grouping_method"])
+        self.excel_backend.set(self.config.get("excel_backend", "xlwings"))
+        self.write_mode.set(self.config.get("write_mode", "all"))
 
         # Загрузка таблиц регионов
         for table in self.config["region_tables"]:
@@ -143,6 +154,8 @@ class ConfigEditor:
                 "fms_sales": self.entries["fms_col"].get()
             }
             self.config["grouping_method"] = self.grouping_method.get()
+            self.config["excel_backend"] = self.excel_backend.get()
+            self.config["write_mode"] = self.write_mode.get()
 
             # Сохранение таблиц регионов
             self.config["region_tables"] = []
@@ -180,6 +193,10 @@ class ConfigEditor:
                 messagebox.showerror("Ошибка", "Не удалось сохранить конфигурацию")
         except Exception as e:
             messagebox.showerror("Ошибка сохранения", str(e))
+        finally:
+            # Конфигурация могла измениться и при ошибке сохранения
+            if self.on_change:
+                self.on_change()
 
     def add_region_table(self):
         self.open_region_table_editor()
@@ -1,20 +1,75 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, scrolledtext
 import logging
-from io import StringIO
 import sys
-import threading
-from core.report_updater import update_reports
+import queue
+import time
+from collections import deque
+from contextlib import nullcontext
+from datetime import datetime
+from core.excel_pool import DEFAULT_IDLE_TIMEOUT, DaemonExecutor, ExcelAppPool
+from core.metrics import RunMetrics
+from core.profiling import DEFAULT_PROFILE_DIR, profile_run
+from core.progress import CancelToken, UpdateCancelled
 from core.config_manager import load_config, save_config, validate_config
 from .config_editor import ConfigEditor
 from .mapping_editor import MappingEditor
 
+IDLE_CHECK_INTERVAL_MS = 60_000
+PRELOAD_DELAY_MS = 500
+LOG_POLL_INTERVAL_MS = 100
+CLOSE_POLL_INTERVAL_MS = 100
+# Сколько ждать завершения обновления и Excel при закрытии окна
+CLOSE_TIMEOUT = 30
+# Сколько последних строк лога держится в окне; полный лог пишется в logs/app.log
+LOG_VIEW_LINES = 2000
+
+# Доли прогресс-бара (в процентах) для этапов обновления
+STAGE_PROGRESS = {
+    "read_input": (0, 40),
+    "plan": (40, 60),
+    "write": (60, 90),
+    "save": (90, 100),
+}
+STAGE_TITLES = {
+    "read_input": "Чтение выгрузки",
+    "plan": "Расчет таблиц",
+    "write": "Запись в отчет",
+    "save": "Сохранение отчета",
+}
+
+def preload_core():
+    try:
+        import core.report_updater
+    except Exception as e:
+        logging.warning(f"Не удалось загрузить модули обновления: {e}")
+
+class QueueLogHandler(logging.Handler):
+    """Передает отформатированные строки лога из любых потоков в очередь для окна"""
+    def __init__(self, log_queue):
+        super().__init__()
+        self.log_queue = log_queue
+        
+    def emit(self, record):
+        try:
+            self.log_queue.put(self.format(record))
+        except Exception:
+            self.handleError(record)
+
 class MainApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Report Updater")
         self.geometry("1000x700")
         self.config = load_config()
+        # Подготовленная к запуску конфигурация, сбрасывается при изменениях в редакторах
+        self.compiled_config = None
+        
+        # Все обновления выполняются в одном рабочем потоке, чтобы один и тот же
+        # запущенный Excel можно было использовать между запусками
+        self.executor = DaemonExecutor(name="report-update")
+        self.closing = False
+        self.excel_pool = ExcelAppPool(idle_timeout=self.config.get("excel_idle_timeout", DEFAULT_IDLE_TIMEOUT))
         
         self.style = ttk.Style()
         self.style.configure("TButton", padding=6, font=("Arial", 10))
@@ -34,9 +89,88 @@ class MainApp(tk.Tk):
         self.create_widgets()
         self.setup_layout()
         
+        # Лог выводится в окно по мере выполнения: обработчик только кладет строки
+        # в очередь, а окно забирает их пачками в основном потоке Tk
+        self.log_view_lines = self.config.get("log_view_lines", LOG_VIEW_LINES)
+        self.log_queue = queue.SimpleQueue()
+        self.log_handler = QueueLogHandler(self.log_queue)
+        self.log_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+        logging.getLogger().addHandler(self.log_handler)
+        self.poll_log_id = self.after(LOG_POLL_INTERVAL_MS, self.poll_log_queue)
+        
         # Горячие клавиши
         self.bind('<Control-s>', self.save_config_shortcut)
-        self.bind('<Control-q>', lambda e: self.destroy())
+        self.bind('<Control-q>', lambda e: self.on_close())
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.after(IDLE_CHECK_INTERVAL_MS, self.check_idle_excel)
+        # pandas и движки Excel загружаются в рабочем потоке уже после показа окна
+        self.after(PRELOAD_DELAY_MS, lambda: self.executor.submit(preload_core))
+        
+    def poll_log_queue(self):
+        lines = deque(maxlen=self.log_view_lines)
+        try:
+            while True:
+                lines.append(self.log_queue.get_nowait())
+        except queue.Empty:
+            pass
+        if lines:
+            self.append_log(lines)
+        self.poll_log_id = self.after(LOG_POLL_INTERVAL_MS, self.poll_log_queue)
+        
+    def append_log(self, lines):
+        self.log_text.config(state=tk.NORMAL)
+        self.log_text.insert(tk.END, "\n".join(lines) + "\n")
+        # Старые строки удаляются, чтобы окно не разрасталось на длинных запусках
+        excess = int(self.log_text.index('end-1c').split('.')[0]) - 1 - self.log_view_lines
+        if excess > 0:
+            self.log_text.delete(1.0, f"{excess + 1}.0")
+        self.log_text.config(state=tk.DISABLED)
+        self.log_text.see(tk.END)
+        
+    def check_idle_excel(self):
+        self.executor.submit(self.excel_pool.close_idle)
+        self.after(IDLE_CHECK_INTERVAL_MS, self.check_idle_excel)
+    
+    def on_close(self):
+        if self.closing:
+            return
+        self.closing = True
+        # Незавершенное обновление прерывается без сохранения отчета. Excel
+        # завершается в рабочем потоке после него, а окно не блокируется
+        # и дожидается этого через after()
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+        self.btn_run.config(state=tk.DISABLED)
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.status_var.set("Завершение работы...")
+        self.shutdown_future = self.executor.submit(self.excel_pool.shutdown)
+        self.close_deadline = time.monotonic() + CLOSE_TIMEOUT
+        self.after(CLOSE_POLL_INTERVAL_MS, self._finish_close)
+        
+    def _finish_close(self):
+        if not self.shutdown_future.done():
+            if time.monotonic() < self.close_deadline:
+                self.after(CLOSE_POLL_INTERVAL_MS, self._finish_close)
+                return
+            # Рабочий поток - демон и не помешает завершению процесса
+            logging.error("Обновление или Excel не завершились вовремя, окно закрывается")
+        elif self.shutdown_future.exception() is not None:
+            logging.error(f"Ошибка при завершении Excel: {self.shutdown_future.exception()}")
+        self.after_cancel(self.poll_log_id)
+        logging.getLogger().removeHandler(self.log_handler)
+        self.executor.shutdown(wait=False)
+        self.destroy()
+        
+    def _post(self, callback, *args):
+        """Передает вызов из рабочего потока в основной поток Tk"""
+        # При закрытии окна результаты обновления уже не показываются
+        if self.closing:
+            return
+        try:
+            self.after(0, callback, *args)
+        except (RuntimeError, tk.TclError):
+            # Окно уже уничтожено
+            pass
         
     def save_config_shortcut(self, event=None):
         if save_config(self.config):
@@ -49,6 +183,9 @@ class MainApp(tk.Tk):
         self.report_file_var = tk.StringVar()
         self.sheet_name_var = tk.StringVar(value="Sheet1")
         self.day_var = tk.IntVar(value=1)
+        # Месяц отчета - ключ дня в хранилище агрегатов, пустой - хранилище не используется
+        self.period_var = tk.StringVar()
+        self.profile_var = tk.BooleanVar(value=False)
         
         # Группировка элементов
         input_frame = ttk.LabelFrame(self.main_frame, text="Источник данных")
@@ -86,6 +223,13 @@ class MainApp(tk.Tk):
         self.entry_day = ttk.Spinbox(settings_frame, textvariable=self.day_var, from_=1, to=31, width=5)
         self.entry_day.grid(row=0, column=3, padx=5, pady=5, sticky='w')
         
+        ttk.Label(settings_frame, text="Месяц (ГГГГ-ММ):").grid(row=0, column=4, sticky='w', padx=5, pady=5)
+        self.entry_period = ttk.Entry(settings_frame, textvariable=self.period_var, width=10)
+        self.entry_period.grid(row=0, column=5, padx=5, pady=5, sticky='w')
+        
+        self.check_profile = ttk.Checkbutton(settings_frame, text="Профилирование", variable=self.profile_var)
+        self.check_profile.grid(row=0, column=6, padx=15, pady=5, sticky='w')
+        
         # Кнопки действий
         self.btn_run = ttk.Button(self.main_frame, text="Обновить отчеты", command=self.run_update, width=20)
         self.btn_config = ttk.Button(self.main_frame, text="Редактировать конфиг", 
@@ -103,7 +247,10 @@ class MainApp(tk.Tk):
         ttk.Button(log_btn_frame, text="Экспорт в файл", command=self.export_log).pack(side=tk.LEFT, padx=2)
         
         # Прогресс-бар
-        self.progress = ttk.Progressbar(self.main_frame, mode='indeterminate')
+        self.progress = ttk.Progressbar(self.main_frame, mode='determinate', maximum=100)
+        self.btn_cancel = ttk.Button(self.main_frame, text="Отмена", command=self.cancel_update,
+                                     state=tk.DISABLED, width=10)
+        self.cancel_token = None
         
         self.status_var = tk.StringVar(value="Готов к работе")
         self.status_bar = ttk.Label(self.main_frame, textvariable=self.status_var, relief=tk.SUNKEN, anchor=tk.W)
@@ -141,7 +288,8 @@ class MainApp(tk.Tk):
         ttk.Button(log_btn_frame, text="Экспорт в файл", command=self.export_log).pack(side=tk.LEFT, padx=2)
         self.log_text.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
         
-        self.progress.grid(row=4, column=0, columnspan=3, sticky='ew', padx=5, pady=5)
+        self.progress.grid(row=4, column=0, columnspan=2, sticky='ew', padx=5, pady=5)
+        self.btn_cancel.grid(row=4, column=2, padx=5, pady=5, sticky='e')
         
         self.status_bar.grid(row=5, column=0, columnspan=3, sticky='ew')
         
@@ -154,15 +302,19 @@ class MainApp(tk.Tk):
         
         if editor_type == "config":
             editor_frame = ttk.Frame(self.notebook)
-            ConfigEditor(editor_frame, self.config)
+            ConfigEditor(editor_frame, self.config, on_change=self.config_changed)
             self.notebook.add(editor_frame, text="Редактор конфигурации")
         else:
             editor_frame = ttk.Frame(self.notebook)
-            MappingEditor(editor_frame, self.config, on_save=self.save_config_callback)
+            MappingEditor(editor_frame, self.config, on_save=self.save_config_callback,
+                          on_change=self.config_changed)
             self.notebook.add(editor_frame, text="Редактор маппингов")
         
         self.notebook.select(len(self.notebook.tabs())-1)
     
+    def config_changed(self):
+        self.compiled_config = None
+    
     def save_config_callback(self):
         """Callback для сохранения конфигурации после изменений в редакторе маппингов"""
         if save_config(self.config):
@@ -173,7 +325,7 @@ class MainApp(tk.Tk):
     def browse_file(self, target_var, title):
         file = filedialog.askopenfilename(
             title=title,
-            filetypes=[("Excel files", "*.xlsx *.xls"), ("All files", "*.*")]
+            filetypes=[("Excel files", "*.xlsx *.xls"), ("CSV files", "*.csv"), ("All files", "*.*")]
         )
         if file:
             target_var.set(file)
@@ -184,60 +336,113 @@ class MainApp(tk.Tk):
             
         self.btn_run.config(state=tk.DISABLED)
         self.btn_config.config(state=tk.DISABLED)
+        self.btn_cancel.config(state=tk.NORMAL)
         self.status_var.set("Выполняется обновление...")
-        self.progress.start(10)
+        self.progress['value'] = 0
         
         self.log_text.config(state=tk.NORMAL)
         self.log_text.delete(1.0, tk.END)
         self.log_text.config(state=tk.DISABLED)
         
-        thread = threading.Thread(target=self._run_update_thread)
-        thread.daemon = True
-        thread.start()
-        
-    def _run_update_thread(self):
+        # Конфигурация передается в обновление из памяти, уже подготовленной,
+        # чтобы правки из редакторов применялись без повторного чтения файла.
+        # Заново она компилируется только после изменений в редакторах
+        if self.compiled_config is None:
+            # К первому запуску модуль обычно уже загружен фоновой предзагрузкой
+            from core.compiled_config import compile_config
+            self.compiled_config = compile_config(self.config)
+        # Значения полей читаются здесь: переменные Tk нельзя трогать из рабочего потока
+        run_args = (
+            self.input_file_var.get(),
+            self.report_file_var.get(),
+            self.sheet_name_var.get(),
+            self.day_var.get(),
+        )
+        period = self.period_var.get().strip() or None
+        profile_dir = self.config.get("profile_dir", DEFAULT_PROFILE_DIR) if self.profile_var.get() else None
+        self.cancel_token = CancelToken()
+        self.executor.submit(self._run_update_thread, self.compiled_config, self.cancel_token,
+                             run_args, period, profile_dir)
+        
+    def cancel_update(self):
+        if self.cancel_token is not None:
+            self.cancel_token.cancel()
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.status_var.set("Отмена обновления...")
+        
+    def on_progress(self, stage, table, done, total):
+        """Вызывается из рабочего потока; окно обновляется в основном потоке Tk"""
+        self._post(self._show_progress, stage, table, done, total)
+        
+    def _show_progress(self, stage, table, done, total):
+        # Нажатая отмена не перекрывается сообщениями о ходе обновления
+        if self.cancel_token is None or self.cancel_token.cancelled:
+            return
+        start, end = STAGE_PROGRESS.get(stage, (0, 100))
+        value = start + (end - start) * done / total if total else start
+        self.progress['value'] = value
+        
+        status = STAGE_TITLES.get(stage, stage)
+        if table:
+            status += f": {table}"
+        if total and stage != "save":
+            status += f" ({done} из {total} строк)"
+        elif done and not total:
+            status += f" ({done} строк)"
+        self.status_var.set(status)
+        
+    def _run_update_thread(self, config, cancel_token, run_args, period=None, profile_dir=None):
         try:
-            log_capture = StringIO()
-            handler = logging.StreamHandler(log_capture)
-            handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-            logging.getLogger().addHandler(handler)
-            logging.getLogger().setLevel(logging.INFO)
+            from core.report_updater import update_reports
             
-            success = update_reports(
-                self.input_file_var.get(),
-                self.report_file_var.get(),
-                self.sheet_name_var.get(),
-                self.day_var.get()
-            )
+            logging.getLogger().setLevel(logging.INFO)
             
-            logging.getLogger().removeHandler(handler)
-            log_content = log_capture.getvalue()
+            metrics = RunMetrics()
+            with profile_run(profile_dir) if profile_dir else nullcontext():
+                success = update_reports(
+                    *run_args,
+                    period=period,
+                    excel_pool=self.excel_pool,
+                    metrics=metrics,
+                    config=config,
+                    on_progress=self.on_progress,
+                    cancel_token=cancel_token
+                )
             
-            self.after(0, self._update_ui_after_run, log_content, success)
+            self._post(self._update_ui_after_run, success, metrics)
+        except UpdateCancelled:
+            self._post(self._update_ui_after_cancel)
         except Exception as e:
-            self.after(0, self._handle_error, str(e))
+            self._post(self._handle_error, str(e))
             
-    def _update_ui_after_run(self, log_content, success):
+    def _update_ui_after_run(self, success, metrics):
         self.btn_run.config(state=tk.NORMAL)
         self.btn_config.config(state=tk.NORMAL)
-        self.progress.stop()
-        
-        self.log_text.config(state=tk.NORMAL)
-        self.log_text.insert(tk.END, log_content)
-        self.log_text.config(state=tk.DISABLED)
-        self.log_text.see(tk.END)
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.cancel_token = None
         
         if success:
-            self.status_var.set("Обновление завершено успешно")
+            self.progress['value'] = 100
+            self.status_var.set(f"Обновление завершено успешно. {metrics.summary()}")
             messagebox.showinfo("Успех", "Отчеты успешно обновлены")
         else:
-            self.status_var.set("Обновление завершено с ошибками")
+            self.status_var.set(f"Обновление завершено с ошибками. {metrics.summary()}")
             messagebox.showerror("Ошибка", "При обновлении отчетов произошли ошибки. Проверьте лог для деталей.")
     
+    def _update_ui_after_cancel(self):
+        self.btn_run.config(state=tk.NORMAL)
+        self.btn_config.config(state=tk.NORMAL)
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.cancel_token = None
+        self.progress['value'] = 0
+        self.status_var.set("Обновление отменено, отчет не изменен")
+    
     def _handle_error(self, error):
         self.btn_run.config(state=tk.NORMAL)
         self.btn_config.config(state=tk.NORMAL)
-        self.progress.stop()
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.cancel_token = None
+        self.progress['value'] = 0
         self.status_var.set("Ошибка выполнения")
         messagebox.showerror("Ошибка", f"Произошла ошибка: {error}")
         logging.error(f"Ошибка в потоке выполнения: {error}")
@@ -259,6 +464,13 @@ class MainApp(tk.Tk):
         except ValueError:
             errors.append("День должен быть числом")
         
+        period = self.period_var.get().strip()
+        if period:
+            try:
+                datetime.strptime(period, "%Y-%m")
+            except ValueError:
+                errors.append("Месяц отчета должен быть в формате ГГГГ-ММ")
+        
         config_errors = validate_config(self.config)
         if config_errors:
             errors.extend(config_errors)
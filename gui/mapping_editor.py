@@ -1,12 +1,12 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import pandas as pd
 
 class MappingEditor:
-    def __init__(self, parent, config, on_save=None):
+    def __init__(self, parent, config, on_save=None, on_change=None):
         self.parent = parent
         self.config = config
         self.on_save = on_save  # Callback для сохранения конфигурации
+        self.on_change = on_change  # Callback после изменения маппингов
         self.create_widgets()
         self.load_data()
         # Привязываем обработчик клика к таблицам
@@ -137,6 +137,9 @@ class MappingEditor:
                 messagebox.showinfo("Успех", "Маппинги сохранены")
         except Exception as e:
             messagebox.showerror("Ошибка сохранения", str(e))
+        finally:
+            if self.on_change:
+                self.on_change()
 
     def add_manager_row(self):
         self.open_manager_editor()
@@ -252,6 +255,9 @@ class MappingEditor:
         if not file_path:
             return
         try:
+            # pandas загружается только при импорте, чтобы не замедлять запуск
+            import pandas as pd
+            
             if file_path.endswith('.csv'):
                 df = pd.read_csv(file_path, encoding='windows-1251', sep=';')
             else:
@@ -277,6 +283,8 @@ class MappingEditor:
         if not file_path:
             return
         try:
+            import pandas as pd
+            
             managers = []
             for item in self.manager_table.get_children():
                 values = self.manager_table.item(item, "values")
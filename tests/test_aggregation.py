@@ -0,0 +1,86 @@
+"""Агрегаты выгрузки: суммы по пунктам и их поиск"""
+import numpy as np
+import pandas as pd
+import pytest
+from core.aggregation import PointIndex, build_run_context, build_streaming_context, canonical_point
+from core.input_reader import read_csv_chunks
+
+CONFIG = {
+    "source_columns": {
+        "point": "пункт", "bms_sales": "лчм", "fms_sales": "лцм",
+        "manager": "менеджер", "region": "регион",
+    },
+    "region_mapping": {"Москва": "Центр"},
+}
+
+STREAM_CONFIG = {
+    **CONFIG,
+    "grouping_method": "manager",
+    "manager_mapping": {"Иванов": "Сектор 1", "Петров": "Сектор 2"},
+    "region_mapping": {"Москва": "Центр", "Тула": "Центр", "Омск": "Сибирь"},
+}
+
+
+def make_export(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "пункт": rng.choice(["НМУС1", "ПП НМУС1", "БСВЗ1", "НКРВ2"], rows),
+        # Значения с дробной частью, сумма которых зависит от порядка сложения
+        "лчм": rng.uniform(-1e6, 1e6, rows).round(3),
+        "лцм": rng.uniform(0, 1, rows) * 10.0 ** rng.integers(-3, 9, rows),
+        "менеджер": rng.choice(["Иванов Иван", "Петров Петр", "Сидоров Сидор"], rows),
+        "регион": rng.choice(["Москва", "Тула", "Омск", "Казань"], rows),
+    })
+
+
+def context_totals(context) -> dict:
+    return {
+        view: {key: dict(value) for key, value in totals.items()}
+        for view, totals in (
+            ("sectors", context.sectors), ("regions", context.regions), ("points", context.points.totals),
+        )
+    }
+
+
+def test_canonical_point():
+    assert canonical_point("пп нмус1") == "нмус1"
+    assert canonical_point("нмус1") == "нмус1"
+    assert canonical_point("пп ") == "пп "
+
+
+def test_prefixed_rows_fold_into_point_total():
+    df = pd.DataFrame({
+        "пункт": ["НМУС1", "ПП НМУС1", "НМУС1", "ПП БСВЗ1"],
+        "лчм": [1.0, 10.0, 100.0, 5.0],
+        "лцм": [2.0, 20.0, 200.0, 0.0],
+        "менеджер": ["Иванов Иван"] * 4,
+        "регион": ["Москва"] * 4,
+    })
+    index = build_run_context(df, CONFIG).points
+    assert len(index) == 2
+    assert dict(index.lookup("нмус1")) == {"bms": 111.0, "fms": 222.0}
+    assert dict(index.lookup("пп нмус1")) == {"bms": 111.0, "fms": 222.0}
+    assert dict(index.lookup("бсвз1")) == {"bms": 5.0, "fms": 0.0}
+    assert index.lookup("нкрв1") is None
+
+
+def test_lookup_does_not_depend_on_how_totals_were_built():
+    # Суммы, сохраненные уже по каноническим названиям, ищутся так же
+    folded = PointIndex({"пп нмус1": {"bms": 7.0, "fms": 1.0}, "нмус1": {"bms": 3.0, "fms": 1.0}})
+    restored = PointIndex(dict(folded.totals))
+    for index in (folded, restored):
+        assert dict(index.lookup("пп нмус1")) == {"bms": 10.0, "fms": 2.0}
+        assert dict(index.lookup("нмус1")) == {"bms": 10.0, "fms": 2.0}
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 250, 10_000])
+def test_streaming_context_matches_in_memory(tmp_path, chunk_rows):
+    df = make_export(2000)
+    csv_file = tmp_path / "export.csv"
+    df.to_csv(csv_file, sep=";", decimal=",", encoding="windows-1251", index=False)
+    config = {**STREAM_CONFIG, "csv_chunk_rows": chunk_rows}
+
+    streamed = build_streaming_context(read_csv_chunks(str(csv_file), config), config)
+    in_memory = build_run_context(next(read_csv_chunks(str(csv_file), {**config, "csv_chunk_rows": len(df)})), config)
+    assert context_totals(streamed) == context_totals(in_memory)
+    assert context_totals(streamed) == context_totals(build_run_context(df, config))
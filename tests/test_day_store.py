@@ -0,0 +1,95 @@
+"""Хранилище агрегатов по дням"""
+import pandas as pd
+import pytest
+from core.aggregation import build_run_context
+from core.day_store import AggregateStore, check_period
+from core.report_updater import obtain_context
+
+CONFIG = {
+    "source_columns": {
+        "point": "пункт", "bms_sales": "лчм", "fms_sales": "лцм",
+        "manager": "менеджер", "region": "регион",
+    },
+    "manager_mapping": {"Иванов": "Сектор 1"},
+    "region_mapping": {"Москва": "Центр", "Омск": "Сибирь"},
+}
+
+
+def make_export(scale: float = 1.0) -> pd.DataFrame:
+    return pd.DataFrame({
+        "пункт": ["НМУС1", "ПП НМУС1", "БСВЗ1"],
+        "лчм": [1.5 * scale, 2.25 * scale, 4.0 * scale],
+        "лцм": [0.1 * scale, 0.2 * scale, 0.3 * scale],
+        "менеджер": ["Иванов Иван"] * 3,
+        "регион": ["Москва", "Москва", "Омск"],
+    })
+
+
+def as_dict(totals) -> dict:
+    return {key: dict(value) for key, value in totals.items()}
+
+
+def test_check_period():
+    assert check_period("2024-3") == "2024-03"
+    with pytest.raises(ValueError):
+        check_period("03.2024")
+
+
+def test_day_round_trip(tmp_path):
+    store = AggregateStore(tmp_path / "agg.sqlite")
+    context = build_run_context(make_export(), CONFIG)
+    store.save_day("2024-03", 5, "abc", context, CONFIG, "export.xlsx")
+
+    loaded = store.load_day("2024-03", 5, CONFIG, "abc")
+    assert as_dict(loaded.sectors) == as_dict(context.sectors)
+    assert as_dict(loaded.regions) == as_dict(context.regions)
+    assert as_dict(loaded.points.totals) == as_dict(context.points.totals)
+    # Пункт с префиксом находится и в агрегатах, загруженных из хранилища
+    assert dict(loaded.points.lookup("пп нмус1")) == dict(context.points.lookup("нмус1"))
+    assert store.days("2024-03") == [5]
+
+
+def test_changed_file_or_mapping_is_not_reused(tmp_path):
+    store = AggregateStore(tmp_path / "agg.sqlite")
+    store.save_day("2024-03", 5, "abc", build_run_context(make_export(), CONFIG), CONFIG)
+
+    assert store.load_day("2024-03", 5, CONFIG, "other") is None
+    changed = {**CONFIG, "region_mapping": {"Москва": "Юг"}}
+    assert store.load_day("2024-03", 5, changed, "abc") is None
+    assert store.load_day("2024-03", 6, CONFIG) is None
+
+
+def test_month_to_date(tmp_path):
+    store = AggregateStore(tmp_path / "agg.sqlite")
+    for day, scale in ((1, 1.0), (2, 10.0), (3, 100.0)):
+        store.save_day("2024-03", day, str(day), build_run_context(make_export(scale), CONFIG), CONFIG)
+
+    totals = store.month_to_date("2024-03", 2, CONFIG)
+    assert dict(totals.regions["Сибирь"]) == {"bms": 44.0, "fms": pytest.approx(3.3)}
+    assert dict(totals.points.lookup("нмус1"))["bms"] == 41.25
+
+
+def test_unavailable_store_falls_back_to_export(tmp_path):
+    export = tmp_path / "export.csv"
+    make_export().to_csv(export, sep=";", decimal=",", encoding="windows-1251", index=False)
+    not_a_dir = tmp_path / "config.json"
+    not_a_dir.write_text("{}")
+    config = {**CONFIG, "cache_dir": str(tmp_path / "cache"), "aggregate_store": str(not_a_dir / "agg.sqlite")}
+
+    context = obtain_context(str(export), config, 5, "2024-03")
+    assert dict(context.points.lookup("нмус1")) == {"bms": 3.75, "fms": pytest.approx(0.3)}
+
+
+def test_read_only_run_writes_nothing(tmp_path):
+    export = tmp_path / "export.csv"
+    make_export().to_csv(export, sep=";", decimal=",", encoding="windows-1251", index=False)
+    store_path = tmp_path / "data" / "agg.sqlite"
+    config = {**CONFIG, "cache_dir": str(tmp_path / "cache"), "aggregate_store": str(store_path)}
+
+    obtain_context(str(export), config, 5, "2024-03", read_only=True)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["export.csv"]
+
+    obtain_context(str(export), config, 5, "2024-03")
+    obtain_context(str(export), config, 6, "2024-03", read_only=True)
+    assert AggregateStore(store_path).days("2024-03") == [5]
+    assert obtain_context(str(export), config, 5, "2024-03", from_store=True, read_only=True) is not None
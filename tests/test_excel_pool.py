@@ -0,0 +1,134 @@
+"""Проверки пула Excel на заглушке xlwings, без запуска настоящего Excel.
+
+Запуск из корня проекта:
+    pytest tests
+"""
+import threading
+import pytest
+from core.excel_pool import DaemonExecutor, ExcelAppPool
+from benchmarks.fake_excel import FakeApp
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def make_pool(**options):
+    apps = []
+
+    def factory():
+        app = FakeApp()
+        apps.append(app)
+        return app
+
+    return ExcelAppPool(app_factory=factory, **options), apps
+
+
+def test_acquire_reuses_released_app():
+    pool, apps = make_pool()
+    app = pool.acquire()
+    pool.release(app)
+
+    assert pool.acquire() is app
+    assert len(apps) == 1
+    assert pool.stats() == {"idle": 0, "busy": 1, "created": 1, "reused": 1}
+
+
+def test_acquire_restarts_unhealthy_app():
+    pool, apps = make_pool()
+    app = pool.acquire()
+    pool.release(app)
+    app.crash()
+
+    new_app = pool.acquire()
+    assert new_app is not app
+    assert app.quitted
+    assert len(apps) == 2
+    assert pool.stats()["reused"] == 0
+
+
+def test_release_closes_books():
+    pool, _ = make_pool()
+    app = pool.acquire()
+    app.books.open("report.xlsx")
+    app.books.open("other.xlsx")
+
+    pool.release(app)
+    assert len(app.books) == 0
+    assert not app.quitted
+    assert pool.stats()["idle"] == 1
+
+
+def test_release_quits_app_over_max_size():
+    pool, _ = make_pool(max_size=1)
+    first, second = pool.acquire(), pool.acquire()
+    pool.release(first)
+    pool.release(second)
+
+    assert not first.quitted
+    assert second.quitted
+    assert pool.stats()["idle"] == 1
+
+
+def test_release_quits_app_when_books_fail():
+    pool, _ = make_pool()
+    app = pool.acquire()
+    app.crash()
+
+    pool.release(app)
+    assert app.quitted
+    assert pool.stats()["idle"] == 0
+
+
+def test_close_idle_uses_injected_clock():
+    clock = FakeClock()
+    pool, _ = make_pool(idle_timeout=300, clock=clock)
+    app = pool.acquire()
+    pool.release(app)
+
+    clock.now = 299
+    assert pool.close_idle() == 0
+    assert not app.quitted
+
+    clock.now = 300
+    assert pool.close_idle() == 1
+    assert app.quitted
+    assert pool.stats()["idle"] == 0
+
+
+def test_shutdown_quits_busy_and_idle_apps():
+    pool, _ = make_pool(max_size=2)
+    idle, busy = pool.acquire(), pool.acquire()
+    pool.release(idle)
+
+    pool.shutdown()
+    assert idle.quitted
+    assert busy.quitted
+    assert pool.stats()["idle"] == 0
+    assert pool.stats()["busy"] == 0
+
+
+def test_daemon_executor_runs_tasks_in_order_on_one_thread():
+    executor = DaemonExecutor()
+    threads = []
+    futures = [executor.submit(lambda n=n: threads.append(threading.current_thread()) or n) for n in range(5)]
+
+    assert [future.result(timeout=5) for future in futures] == list(range(5))
+    assert len(set(threads)) == 1
+    assert threads[0].daemon
+    assert threads[0] is not threading.current_thread()
+    executor.shutdown()
+
+
+def test_daemon_executor_reports_errors_and_stops():
+    executor = DaemonExecutor()
+    future = executor.submit(lambda: 1 / 0)
+    assert isinstance(future.exception(timeout=5), ZeroDivisionError)
+
+    executor.shutdown()
+    with pytest.raises(RuntimeError):
+        executor.submit(print)
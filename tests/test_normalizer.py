@@ -0,0 +1,30 @@
+"""Нормализация совпадает с исходной построчной реализацией.
+
+Запуск из корня проекта:
+    pytest tests
+"""
+import pandas as pd
+from benchmarks.bench_normalize import SAMPLES, make_series, reference_normalize_string
+from core.normalizer import extract_surname, extract_surname_series, normalize_series, normalize_string
+
+
+def test_normalize_string_matches_reference():
+    for value in SAMPLES + [None, 42.0]:
+        assert normalize_string(value) == reference_normalize_string(value)
+
+
+def test_normalize_series_matches_scalar():
+    values = make_series(5000, 20)
+    expected = values.apply(normalize_string)
+    assert normalize_series(values).tolist() == expected.tolist()
+    assert normalize_series(values.astype("category")).tolist() == expected.tolist()
+
+
+def test_extract_surname_series_matches_scalar():
+    values = make_series(5000, 20)
+    assert extract_surname_series(values).tolist() == values.apply(extract_surname).tolist()
+
+
+def test_normalize_series_keeps_index():
+    values = pd.Series(["ПП НМУС1", "нмус1"], index=[10, 20])
+    assert normalize_series(values).index.tolist() == [10, 20]
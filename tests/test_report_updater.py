@@ -0,0 +1,31 @@
+"""Разбор заголовков таблиц отчета"""
+from datetime import date, datetime, time, timedelta
+import pytest
+from core.report_updater import day_column_index, header_day
+
+
+@pytest.mark.parametrize("value, day", [
+    (5.0, 5),
+    (31, 31),
+    ("7", 7),
+    (" 12 ", 12),
+    ("3.0", 3),
+    (datetime(2024, 3, 9, 0, 0), 9),
+    (date(2024, 3, 14), 14),
+])
+def test_header_day(value, day):
+    assert header_day(value) == day
+
+
+@pytest.mark.parametrize("value", [
+    None, True, False, "", "итого", "2.5", 2.5, float("nan"),
+    time(10, 30), timedelta(days=3),
+])
+def test_header_day_skips_other_cells(value):
+    assert header_day(value) is None
+
+
+def test_day_column_index():
+    header = ("Регион", 1.0, "2", datetime(2024, 3, 3), time(12, 0), None, 2.0, "Итого")
+    index = day_column_index(header, 10)
+    assert dict(index) == {1: 11, 2: 12, 3: 13}
@@ -0,0 +1,43 @@
+"""Сравнение значений листа с рассчитанными при записи только измененных ячеек"""
+from datetime import datetime
+import numpy as np
+import pytest
+from core.workbook import SheetSnapshot
+from core.write_plan import TableWrite, WritePlan, _same_value, skip_unchanged
+
+
+@pytest.mark.parametrize("current, value", [
+    (1818.9, 1818.8999999999999),
+    (1818.9, np.float64(1818.8999999999999)),
+    (5.0, 5),
+    (5.0, np.int64(5)),
+    (0.0, 0),
+    (1e15, 1e15 + 0.1),
+    ("НМУС1", "НМУС1"),
+    (None, None),
+    (True, True),
+])
+def test_same_value(current, value):
+    assert _same_value(current, value)
+
+
+@pytest.mark.parametrize("current, value", [
+    (1818.9, 1818.91),
+    (0.0, 1e-300),
+    (None, 0),
+    (1.0, True),
+    (True, 1),
+    ("5", 5.0),
+    (datetime(2024, 3, 5), 5.0),
+])
+def test_different_value(current, value):
+    assert not _same_value(current, value)
+
+
+def test_skip_unchanged_keeps_only_changed_cells():
+    snapshot = SheetSnapshot([[1818.9], [2.0], [None], [4.0]], 10, 3)
+    plan = WritePlan("Sheet1", 5)
+    plan.add(TableWrite("ЛЧМ", "region", 10, 3, [1818.8999999999999, 3.0, None, 0.0]))
+
+    result = skip_unchanged(plan, snapshot)
+    assert result.tables[0].values == [None, 3.0, None, 0.0]